@@ -0,0 +1,89 @@
+"""Benchmark of the cleaning stage of ExcelProcessor on a synthetic sheet
+
+Builds a 200k-row, 10-column frame shaped like a planning sheet (repeated
+values, null markers, datetimes and fully empty rows) and times cleaning
+plus empty-row filtering, with the former per-column chain and row-wise
+apply against clean_columns and meaningful_rows. Both results must be equal.
+
+Run from the repository root:
+    python benchmarks/bench_cleaning.py [rows]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.excel_processor import clean_columns, meaningful_rows
+
+NULL_MARKERS = ['nan', 'NaT', 'None', 'NA', 'N/A']
+
+
+def make_frame(n, seed=0):
+    """Synthetic sheet frame of n rows, a fifth of them empty"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Site': rng.choice(['LE', 'BGL', None], n),
+        'Serie': rng.choice(['BB27000', ' BB75000 ', 'N/A', None], n),
+        'Locomotive': rng.integers(27000, 27100, n).astype(float),
+        'CodeOp': rng.choice(['VL', 'VG', 'nan', None], n),
+        'Commentaire': rng.choice(['révision', 'visite limitée', '', None], n),
+        'Date programmation': pd.to_datetime('2025-05-01') + pd.to_timedelta(rng.integers(0, 60, n), 'D'),
+        'Heure programmation': rng.choice(['08:00', '13:30', None], n),
+        'Date sortie': rng.choice(['01/05/2025', '02/05/2025', None], n),
+        'Heure sortie': rng.choice(['08:00', None], n),
+        'Semaine de programmation': rng.choice([18.0, 19.0, np.nan], n),
+    })
+    df.loc[rng.random(n) < 0.2, :] = None
+    return df
+
+
+def clean_before(df):
+    """Cleaning and empty-row filter as done before clean_columns"""
+    df = df.copy()
+    for col in df.columns:
+        df[col] = df[col].fillna('')
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            try:
+                df[col] = df[col].astype(str).str.strip()
+            except Exception:
+                df[col] = df[col].fillna('').astype(str)
+        df[col] = df[col].replace(NULL_MARKERS, '')
+    value_cols = [col for col in df.columns if col != 'Site']
+
+    def has_content(row):
+        for col in value_cols:
+            value = str(row[col]).strip()
+            if value and value not in ['', *NULL_MARKERS]:
+                return True
+        return False
+
+    return df[df.apply(has_content, axis=1)]
+
+
+def clean_after(df):
+    """Cleaning and empty-row filter with clean_columns and meaningful_rows"""
+    df = clean_columns(df)
+    return df[meaningful_rows(df, [col for col in df.columns if col != 'Site'])]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = make_frame(n)
+
+    start = time.perf_counter()
+    before = clean_before(df)
+    time_before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = clean_after(df)
+    time_after = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(before, after)
+    print(f"rows={n} kept={len(after)} before={time_before:.2f}s after={time_after:.2f}s "
+          f"speedup={time_before / time_after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
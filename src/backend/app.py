@@ -15,6 +15,7 @@ from werkzeug.utils import secure_filename
 import traceback
 import logging
 import argparse
+import multiprocessing
 
 def setup_logging():
     try:
@@ -85,6 +86,14 @@ if getattr(sys, 'frozen', False):
                 return False
             def get_sheet_data(self, sheet_name, is_base_file=False):
                 return pd.DataFrame()
+            def close(self):
+                pass
+            @staticmethod
+            def probe_workbook(file_path):
+                return None
+            @staticmethod
+            def load_sheets(tasks, max_workers=None):
+                return iter(())
     
     try:
         from site_matcher import SiteMatcher
@@ -164,6 +173,22 @@ def get_docs_directory():
     
     return docs_dir
 
+def read_sheet_list(filepath):
+    """Get the sheets of an uploaded workbook with their sizes, or None if it cannot be read
+
+    The xlsx container is probed without parsing any cell; other formats
+    fall back to opening the workbook, and their sizes are unknown.
+    """
+    sheets = ExcelProcessor.probe_workbook(filepath)
+    if sheets is None:
+        processor = ExcelProcessor(filepath)
+        if not processor.load_workbook():
+            return None
+        processor.close()
+        sheets = [{'name': name, 'rows': None, 'columns': None, 'estimated': False}
+                  for name in processor.sheet_names]
+    return sheets
+
 def get_legal_docs_directory():
     """Get the correct legal docs directory path for both development and packaged modes"""
     docs_dir = get_docs_directory()
@@ -280,15 +305,17 @@ def upload_base_file():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
-        # Process the file
-        processor = ExcelProcessor(filepath)
-        if processor.load_workbook():
-            session_data['base_file_info'] = FileInfo.from_path(filepath, processor.sheet_names)
+        # List the sheets without parsing them
+        sheets = read_sheet_list(filepath)
+        if sheets is not None:
+            sheet_names = [sheet['name'] for sheet in sheets]
+            session_data['base_file_info'] = FileInfo.from_path(filepath, sheet_names)
             logger.info(f"Base file uploaded: {filename}")
             return jsonify({
                 'success': True,
                 'filename': filename,
-                'sheets': processor.sheet_names,
+                'sheets': sheet_names,
+                'sheet_sizes': sheets,
                 'message': f'Fichier de base chargé: {filename}'
             })
         else:
@@ -315,13 +342,15 @@ def upload_comparison_files():
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 file.save(filepath)
                 
-                processor = ExcelProcessor(filepath)
-                if processor.load_workbook():
-                    file_info = FileInfo.from_path(filepath, processor.sheet_names)
+                sheets = read_sheet_list(filepath)
+                if sheets is not None:
+                    sheet_names = [sheet['name'] for sheet in sheets]
+                    file_info = FileInfo.from_path(filepath, sheet_names)
                     session_data['comp_file_info'].append(file_info)
                     processed_files.append({
                         'filename': filename,
-                        'sheets': processor.sheet_names
+                        'sheets': sheet_names,
+                        'sheet_sizes': sheets
                     })
                 else:
                     logger.error(f"Failed to process comparison file: {filename}")
@@ -372,6 +401,7 @@ def preview_sheet():
         processor = ExcelProcessor(filepath)
         if processor.load_workbook():
             processed_data = processor.get_sheet_data(sheet_name, is_base_file=is_base_file, file_type=file_type)
+            processor.close()
             
             # For regular preview, limit to 5 rows
             processed_preview = processed_data.head(5).fillna('').to_dict('records')
@@ -913,4 +943,6 @@ def main():
     )
 
 if __name__ == '__main__':
+    # Needed by the sheet loader process pool in the frozen executable
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -44,6 +44,7 @@ class AnalysisEngine:
                 raise Exception("Failed to load Excel file")
             
             df = processor.get_sheet_data(sheet_name, is_base_file=True)
+            processor.close()
             if df.empty:
                 raise Exception("No data found in the sheet")
             
@@ -115,23 +116,20 @@ class AnalysisEngine:
                         logger.info(f"Found {missing_count} invalid dates in {col}")
             
             # Combine with time columns, but don't use default dates
-            if 'Date de Début' in df.columns and 'Heure de Début' in df.columns:
-                df['DateTime de Début'] = df.apply(
-                    lambda row: self.combine_date_time(
-                        row['Date de Début'], 
-                        row['Heure de Début']
-                    ) if pd.notna(row['Date de Début']) else pd.NaT, 
-                    axis=1
-                )
-            
-            if 'Date de Fin' in df.columns and 'Heure de Fin' in df.columns:
-                df['DateTime de Fin'] = df.apply(
-                    lambda row: self.combine_date_time(
-                        row['Date de Fin'], 
-                        row['Heure de Fin']
-                    ) if pd.notna(row['Date de Fin']) else pd.NaT, 
-                    axis=1
-                )
+            for date_col, time_col, target in [('Date de Début', 'Heure de Début', 'DateTime de Début'),
+                                               ('Date de Fin', 'Heure de Fin', 'DateTime de Fin')]:
+                if date_col not in df.columns or time_col not in df.columns:
+                    continue
+                if f"{time_col}_Minutes" in df.columns and pd.api.types.is_datetime64_any_dtype(df[date_col]):
+                    df[target] = self.combine_date_minutes(df[date_col], df[f"{time_col}_Minutes"])
+                else:
+                    df[target] = df.apply(
+                        lambda row: self.combine_date_time(
+                            row[date_col], 
+                            row[time_col]
+                        ) if pd.notna(row[date_col]) else pd.NaT, 
+                        axis=1
+                    )
                 
             # Fix inverted dates (when end date is before start date)
             date_col = 'DateTime de Début' if 'DateTime de Début' in df.columns else 'Date de Début'
@@ -213,6 +211,13 @@ class AnalysisEngine:
             
         return result
     
+    def combine_date_minutes(self, dates, minutes):
+        """Set the time of each date from minutes since midnight, keeping dates without a valid time"""
+        valid = (minutes >= 0) & dates.notna()
+        current = dates.dt.hour * 60 + dates.dt.minute
+        shift = pd.to_timedelta((minutes - current).where(valid, 0), unit='m')
+        return dates + shift
+
     def combine_date_time(self, date_val, time_val):
         """Combine date and time values"""
         if pd.isna(date_val):
@@ -243,6 +248,12 @@ class AnalysisEngine:
     def prepare_php_data(self, df, site):
         """Clean and prepare PHP data for analysis - keep all rows but flag invalid ones"""
         df_clean = df.copy()
+        # Compact frames hold categoricals and downcast integers: expand them back
+        for i, dtype in enumerate(df_clean.dtypes):
+            if isinstance(dtype, pd.CategoricalDtype):
+                df_clean.isetitem(i, df_clean.iloc[:, i].astype(object))
+            elif pd.api.types.is_integer_dtype(dtype) and dtype.itemsize < 4:
+                df_clean.isetitem(i, df_clean.iloc[:, i].astype(np.int32))
         df_clean['Site'] = site
         df_clean = df_clean.fillna('')
         
@@ -0,0 +1,153 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Blocking keys available to the rules of a CandidateIndex
+BLOCKING_KEYS = ['locomotive', 'serie', 'week', 'key_ngrams']
+
+class CandidateIndex:
+    """Candidate row pairs for the similarity methods, found through blocking keys
+
+    Each rule is a list of blocking keys: two rows form a candidate pair when
+    they share the values of every key of at least one rule. Rows with an
+    empty key value do not take part in that rule. The key_ngrams key pairs
+    rows whose composite keys share enough character n-grams; n-grams found
+    in too many rows carry no information and are ignored.
+
+    Pairs are found by joining inverted indexes (key value -> rows) of both
+    frames, so the cost follows the number of candidates instead of the
+    number of all row pairs.
+    """
+
+    def __init__(self, rules, ngram_size=3, ngram_min_overlap=0.6, ngram_max_share=0.05):
+        self.rules = [list(rule) for rule in rules]
+        self.ngram_size = ngram_size
+        self.ngram_min_overlap = ngram_min_overlap
+        self.ngram_max_share = ngram_max_share
+        for rule in self.rules:
+            unknown = [key for key in rule if key not in BLOCKING_KEYS]
+            if unknown:
+                raise ValueError(f"Unknown blocking keys: {unknown}")
+
+    def candidate_pairs(self, base, comp):
+        """Get (base rows, comparison rows, stats) for two frames built by normalize_key
+
+        Rows are positions in the frames; pairs are sorted by base row, then
+        comparison row. stats holds the number of candidate pairs out of all
+        pairs and the share of pairs pruned, overall and for each rule.
+        """
+        n, m = len(base), len(comp)
+        codes = []
+        stats = {'base_rows': n, 'comp_rows': m, 'all_pairs': n * m, 'rules': {}}
+        if not n or not m:
+            stats.update(candidate_pairs=0, pruning_ratio=0.0)
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), stats
+        for rule in self.rules:
+            if rule == ['key_ngrams']:
+                base_rows, comp_rows = self._ngram_pairs(base, comp)
+            else:
+                base_rows, comp_rows = self._key_pairs(self._rule_values(base, rule), self._rule_values(comp, rule))
+            stats['rules']['+'.join(rule)] = len(base_rows)
+            codes.append(base_rows.astype(np.int64) * m + comp_rows)
+
+        codes = np.unique(np.concatenate(codes)) if codes else np.empty(0, dtype=np.int64)
+        stats['candidate_pairs'] = len(codes)
+        stats['pruning_ratio'] = 1 - len(codes) / (n * m)
+        return codes // m, codes % m, stats
+
+    def _rule_values(self, df, rule):
+        """Composite value of the keys of a rule for each row, '' when any is empty"""
+        parts = [self._key_values(df, key) for key in rule]
+        values = parts[0]
+        for part in parts[1:]:
+            values = (values + '\x1f' + part).where((values != '') & (part != ''), '')
+        return values
+
+    @staticmethod
+    def _key_values(df, key):
+        """Normalized value of a blocking key for each row"""
+        empty = pd.Series('', index=df.index)
+        if key == 'locomotive':
+            if 'Locomotive' not in df.columns:
+                return empty
+            values = df['Locomotive'].astype(str).str.upper().str.replace(r'\s+|\.0$', '', regex=True)
+            # The locomotive number, so "BB27001" and "27001" block together
+            digits = values.str.replace(r'\D', '', regex=True)
+            return digits.where(digits != '', values).replace('NAN', '')
+        if key == 'serie':
+            if 'Serie' not in df.columns:
+                return empty
+            values = df['Serie'].astype(str).str.strip().str.upper().str.replace(r'\.0$', '', regex=True)
+            return values.replace('NAN', '')
+        if key == 'week':
+            return CandidateIndex._week_values(df)
+        return empty
+
+    @staticmethod
+    def _week_values(df):
+        """Programming week of each row, or the ISO week of its programming date"""
+        weeks = pd.Series('', index=df.index)
+        if 'Semaine de programmation' in df.columns:
+            weeks = df['Semaine de programmation'].astype(str).str.strip().str.upper()
+            weeks = weeks.str.replace(r'\.0$', '', regex=True).str.replace(r'^S0*', '', regex=True)
+            weeks = weeks.where(weeks.str.fullmatch(r'\d+'), '').str.lstrip('0')
+        if 'Date programmation' in df.columns:
+            dates = pd.to_datetime(df['Date programmation'].where(df['Date programmation'] != ''), errors='coerce')
+            iso_weeks = dates.dt.isocalendar().week.astype('Int64').astype(str).replace('<NA>', '')
+            weeks = weeks.where(weeks != '', iso_weeks)
+        return weeks
+
+    @staticmethod
+    def _key_pairs(base_values, comp_values):
+        """Rows of both sides sharing a non-empty value"""
+        base_rows = pd.DataFrame({'value': base_values.to_numpy(), 'base': np.arange(len(base_values))})
+        comp_rows = pd.DataFrame({'value': comp_values.to_numpy(), 'comp': np.arange(len(comp_values))})
+        pairs = base_rows[base_rows['value'] != ''].merge(comp_rows[comp_rows['value'] != ''], on='value')
+        return pairs['base'].to_numpy(dtype=np.int64), pairs['comp'].to_numpy(dtype=np.int64)
+
+    def _ngrams(self, key):
+        """Distinct character n-grams of a composite key"""
+        text = re.sub(r'\s+', '', str(key).upper())
+        if len(text) <= self.ngram_size:
+            return {text} if text else set()
+        return {text[i:i + self.ngram_size] for i in range(len(text) - self.ngram_size + 1)}
+
+    def _ngram_pairs(self, base, comp):
+        """Rows whose composite keys share at least ngram_min_overlap of their informative n-grams"""
+        empty = np.empty(0, dtype=np.int64)
+        if 'key' not in base.columns or 'key' not in comp.columns or not len(base) or not len(comp):
+            return empty, empty
+        # Work on distinct keys, rows are expanded at the end
+        base_codes, base_keys = pd.factorize(base['key'].astype(str))
+        comp_codes, comp_keys = pd.factorize(comp['key'].astype(str))
+        base_grams = pd.DataFrame(
+            [(i, gram) for i, key in enumerate(base_keys) for gram in self._ngrams(key)], columns=['base', 'gram'])
+        comp_grams = pd.DataFrame(
+            [(i, gram) for i, key in enumerate(comp_keys) for gram in self._ngrams(key)], columns=['comp', 'gram'])
+        if base_grams.empty or comp_grams.empty:
+            return empty, empty
+
+        # Drop n-grams shared by too many keys on either side
+        limit_base = max(1, int(self.ngram_max_share * len(base_keys)))
+        limit_comp = max(1, int(self.ngram_max_share * len(comp_keys)))
+        base_counts = base_grams['gram'].map(base_grams['gram'].value_counts())
+        comp_counts = comp_grams['gram'].map(comp_grams['gram'].value_counts())
+        base_grams = base_grams[base_counts <= limit_base]
+        comp_grams = comp_grams[comp_counts <= limit_comp]
+
+        shared = base_grams.merge(comp_grams, on='gram').groupby(['base', 'comp']).size()
+        if shared.empty:
+            return empty, empty
+        base_key_rows = shared.index.get_level_values('base').to_numpy()
+        comp_key_rows = shared.index.get_level_values('comp').to_numpy()
+        base_sizes = base_grams.groupby('base').size().reindex(range(len(base_keys)), fill_value=0).to_numpy()
+        comp_sizes = comp_grams.groupby('comp').size().reindex(range(len(comp_keys)), fill_value=0).to_numpy()
+        needed = self.ngram_min_overlap * np.minimum(base_sizes[base_key_rows], comp_sizes[comp_key_rows])
+        keep = shared.to_numpy() >= needed
+        key_pairs = pd.DataFrame({'base_key': base_key_rows[keep], 'comp_key': comp_key_rows[keep]})
+
+        # Expand pairs of distinct keys to the rows holding them
+        base_rows = pd.DataFrame({'base_key': base_codes, 'base': np.arange(len(base_codes))})
+        comp_rows = pd.DataFrame({'comp_key': comp_codes, 'comp': np.arange(len(comp_codes))})
+        pairs = key_pairs.merge(base_rows, on='base_key').merge(comp_rows, on='comp_key')
+        return pairs['base'].to_numpy(dtype=np.int64), pairs['comp'].to_numpy(dtype=np.int64)
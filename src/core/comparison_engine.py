@@ -1,14 +1,111 @@
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 import warnings
 from datetime import datetime
 from time import time
 import numpy as np
 import soundex
+import itertools
+import sys
+
+if getattr(sys, 'frozen', False):
+    from candidate_blocking import CandidateIndex
+    from semantic_index import SemanticIndex
+    from pair_scoring import PairScorer
+else:
+    from src.core.candidate_blocking import CandidateIndex
+    from src.core.semantic_index import SemanticIndex
+    from src.core.pair_scoring import PairScorer
+
+class DuplicateRows:
+    """Rows of a prepared frame whose key is not unique, materialized on demand
+
+    Rows are found by hashing the keys once: rows are positions in the
+    prepared frame, ordered by key. len() is the number of duplicate rows;
+    frame() builds the displayed frame, with the spreadsheet row number in
+    'Base Row' or 'Comp Row', on first use only.
+    """
+
+    def __init__(self, prepared, source='base'):
+        self.prepared = prepared
+        self.row_col = 'Base Row' if source == 'base' else 'Comp Row'
+        keys = prepared['key']
+        codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        rows = np.flatnonzero(np.bincount(codes, minlength=len(uniques))[codes] > 1)
+        # Same order as sorting the duplicate rows by key
+        order = keys.iloc[rows].reset_index(drop=True).sort_values().index.to_numpy()
+        self.rows = rows[order]
+        self._frame = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def frame(self):
+        """Duplicate rows of the prepared frame, with their spreadsheet row number"""
+        if self._frame is None:
+            data = self.prepared.iloc[self.rows]
+            self._frame = data.assign(**{self.row_col: data.index + 2})
+        return self._frame
+
+
+class PreparedFrames:
+    """Prepared, key-normalized frames of one comparison
+
+    Each input frame goes through prepare and normalize_key once, and all
+    the comparison methods and duplicate detection reuse the result. Frames
+    are held by identity, along with the input frame so its id is not
+    reused. Frames handed out are shared: callers must not modify them.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.frames = {}
+        self.duplicates = {}
+        self.stats = {'frames': 0, 'prepared': 0, 'derived': 0, 'reused': 0, 'duplicate_indexes': 0}
+
+    def get(self, df):
+        """Get the prepared frame of df, preparing it on first use"""
+        entry = self.frames.get(id(df))
+        if entry is not None and entry[0] is df:
+            self.stats['reused'] += 1
+            return entry[1]
+        prepared = self.engine.normalize_key(self.engine.prepare(df)).reset_index(drop=True)
+        self.frames[id(df)] = (df, prepared)
+        self.stats['frames'] += 1
+        self.stats['prepared'] += 1
+        return prepared
+
+    def derive(self, df, source, rows):
+        """Register df, the rows (positions) of source, with the matching rows of the prepared source"""
+        prepared = self.get(source).iloc[rows].reset_index(drop=True)
+        self.frames[id(df)] = (df, prepared)
+        self.stats['frames'] += 1
+        self.stats['derived'] += 1
+        return prepared
+
+    def duplicate_rows(self, df, source='base'):
+        """Get the DuplicateRows of df, indexing its prepared frame on first use"""
+        entry = self.frames.get(id(df))
+        prepared = entry[1] if entry is not None and entry[0] is df else self.get(df)
+        duplicates = self.duplicates.get((id(df), source))
+        if duplicates is None or duplicates.prepared is not prepared:
+            duplicates = DuplicateRows(prepared, source)
+            self.duplicates[(id(df), source)] = duplicates
+            self.stats['duplicate_indexes'] += 1
+        return duplicates
+
 
 class ComparisonEngine:
     """Enhanced engine with multiple comparison methods for maximum accuracy"""
-    
+
+    # Multiple fuzzy algorithms, averaged
+    FUZZY_ALGORITHMS = {
+        'ratio': fuzz.ratio,
+        'partial_ratio': fuzz.partial_ratio,
+        'token_sort_ratio': fuzz.token_sort_ratio,
+        'token_set_ratio': fuzz.token_set_ratio
+    }
+
     def __init__(self, key_columns=None, value_columns=None, fuzzy_threshold=100):
         # Default key columns (B, C, D)
         self.key_columns = key_columns or ["Serie", "Locomotive", "CodeOp"]
@@ -29,6 +126,37 @@ class ComparisonEngine:
             'date': {'weight': 0.2, 'enabled': True}
         }
 
+        # Candidate blocking for the similarity methods (fuzzy, semantic, phonetic):
+        # rows are only scored against rows sharing the keys of one of the rules
+        self.blocking = {
+            'enabled': True,
+            'rules': [['locomotive'], ['serie', 'week'], ['key_ngrams']],
+            'ngram_size': 3,
+            'ngram_min_overlap': 0.6,
+            'ngram_max_share': 0.05
+        }
+        self.blocking_stats = None  # Candidate pair counts of the last comparison
+
+        # Token index of the semantic method: only pairs of texts likely to pass its
+        # threshold are scored; a recall of 1.0 finds them all, lower uses MinHash LSH,
+        # faster on long texts
+        self.semantic_index = {
+            'enabled': True,
+            'recall': 1.0,
+            'num_perm': 128,
+            'seed': 0
+        }
+
+        # Similarity methods only match the rows the exact join left unmatched
+        # (removed base rows against added comparison rows)
+        self.residual_matching = True
+
+        # Scores of distinct value pairs shared by the similarity methods, kept across comparisons
+        self.pair_scorer = PairScorer()
+        self.score_stats = None  # Memo hits and misses of the last comparison
+        self.prepared_frames = None  # PreparedFrames of the running comparison
+        self.prepare_stats = None  # Preparation counts of the last comparison
+
         self.confidence_thresholds = {
             'high': 0.9,
             'medium': 0.7,
@@ -54,7 +182,12 @@ class ComparisonEngine:
 
     def prepare(self, df):
         """Clean and convert DataFrame columns"""
-        df = df.copy().fillna("")
+        df = df.copy()
+        # Compact frames hold categoricals: expand them back to plain values
+        for i, dtype in enumerate(df.dtypes):
+            if isinstance(dtype, pd.CategoricalDtype):
+                df.isetitem(i, df.iloc[:, i].astype(object))
+        df = df.fillna("")
         df.columns = pd.Index([f"{col}_{i}" if df.columns[:i+1].tolist().count(col) > 1 else col 
                               for i, col in enumerate(df.columns)])
         
@@ -97,6 +230,28 @@ class ComparisonEngine:
         df = df.fillna("")
         return df
 
+    def prepared(self, df):
+        """Prepared, key-normalized frame of df, shared within a comparison"""
+        if self.prepared_frames is None:
+            return self.normalize_key(self.prepare(df)).reset_index(drop=True)
+        return self.prepared_frames.get(df)
+
+    def _start_preparing(self):
+        """Share prepared frames until _stop_preparing; returns False if already sharing"""
+        if self.prepared_frames is not None:
+            return False
+        self.prepared_frames = PreparedFrames(self)
+        return True
+
+    def _stop_preparing(self):
+        """Stop sharing prepared frames and keep the preparation counts"""
+        self.prepare_stats = self.prepared_frames.stats
+        self.prepared_frames = None
+        print(f"Prepared frames: {self.prepare_stats['frames']} frames, "
+              f"{self.prepare_stats['prepared']} prepared, {self.prepare_stats['derived']} derived, "
+              f"{self.prepare_stats['reused']} reused, "
+              f"{self.prepare_stats['duplicate_indexes']} duplicate indexes")
+
     def normalize_key(self, df):
         """Build composite key column from key_columns"""
         df = df.copy()
@@ -131,113 +286,160 @@ class ComparisonEngine:
         Columns: Key, Column (if modified), Base Value, Comparison Value, Status
         Status ∈ {Ajoutée, Supprimée, Modifiée}
         """
-        base = self.normalize_key(self.prepare(base_df)).reset_index(drop=True)
-        comp = self.normalize_key(self.prepare(comp_df)).reset_index(drop=True)
-        base['Base Row'] = base.index + 2
-        comp['Comp Row'] = comp.index + 2
+        base = self.prepared(base_df)
+        comp = self.prepared(comp_df)
 
         # Only use value columns that exist in both DataFrames
         base_value_cols = [col for col in self.value_columns if col in base.columns]
         comp_value_cols = [col for col in self.value_columns if col in comp.columns]
         common_value_cols = list(set(base_value_cols) & set(comp_value_cols))
 
+        # Rows of each key on both sides; values are looked up by row
         merged = (
-            base.set_index('key')[common_value_cols + ['Base Row']]
-            .join(comp.set_index('key')[common_value_cols + ['Comp Row']], how='outer',
-                  lsuffix='_base', rsuffix='_comp', sort=False)
+            pd.DataFrame({'key': base['key'], 'Base Row': base.index + 2}).set_index('key')
+            .join(pd.DataFrame({'key': comp['key'], 'Comp Row': comp.index + 2}).set_index('key'),
+                  how='outer', sort=False)
             .reset_index()
         )
-        results = []
-        base_keys = set(base['key'])
-        comp_keys = set(comp['key'])
-        
-        # Track which keys we've already processed to avoid duplicates
-        processed_keys = set()
+        # Join indicator: side(s) each merged row comes from
+        in_base = merged['Base Row'].notna().to_numpy()
+        in_comp = merged['Comp Row'].notna().to_numpy()
+        first_of_key = ~merged['key'].duplicated().to_numpy()
+        records = []
 
-        for _, row in merged.iterrows():
-            key = row['key']
-            
-            # Skip if we've already processed this key
-            if key in processed_keys:
-                continue
-                
-            in_base = key in base_keys
-            in_comp = key in comp_keys
-            base_row = row.get('Base Row', '')
-            comp_row = row.get('Comp Row', '')
-            
-            # Added or removed
-            if not in_base and in_comp:
-                results.append({
-                    'Key': key, 
-                    'Status': 'Ajoutée', 
-                    'Column': '',
-                    'Base Value': '',
-                    'Comparison Value': '',
-                    'Base Row': '', 
-                    'Comp Row': comp_row
-                })
-                processed_keys.add(key)
-            elif in_base and not in_comp:
-                results.append({
-                    'Key': key, 
-                    'Status': 'Supprimée', 
-                    'Column': '',
-                    'Base Value': '',
-                    'Comparison Value': '',
-                    'Base Row': base_row, 
-                    'Comp Row': ''
-                })
-                processed_keys.add(key)
-            else:
-                # Compare each common value column
-                row_has_changes = False
-                row_changes = []
-                
-                for col in common_value_cols:
-                    vb = row[f'{col}_base']
-                    vc = row[f'{col}_comp']
-                    
-                    # Skip if both are NaN/empty
-                    if (pd.isna(vb) or str(vb).strip() == '') and (pd.isna(vc) or str(vc).strip() == ''):
-                        continue
-                        
-                    # Skip if values are the same
-                    if str(vb).strip() == str(vc).strip():
-                        continue
-                    
-                    # Fuzzy match for strings
-                    if isinstance(vb, str) and isinstance(vc, str):
-                        if fuzz.ratio(str(vb).strip(), str(vc).strip()) >= self.fuzzy_threshold:
-                            continue
-                    
-                    # This column has a difference
-                    row_changes.append({
-                        'Key': key,
-                        'Column': col,
-                        'Base Value': vb,
-                        'Comparison Value': vc,
-                        'Status': 'Modifiée',
-                        'Base Row': base_row,
-                        'Comp Row': comp_row
-                    })
-                    row_has_changes = True
-                
-                # Add all changes for this key
-                if row_has_changes:
-                    results.extend(row_changes)
-                    processed_keys.add(key)
-        
-        return pd.DataFrame(results)
+        # Added or removed keys, reported on the first row of each key
+        for status, rows in (('Ajoutée', ~in_base & in_comp), ('Supprimée', in_base & ~in_comp)):
+            positions = np.flatnonzero(rows & first_of_key)
+            records.append({
+                'position': positions,
+                'column_index': np.full(len(positions), -1),
+                'Key': merged['key'].to_numpy(dtype=object)[positions],
+                'Status': np.full(len(positions), status, dtype=object),
+                'Column': np.full(len(positions), '', dtype=object),
+                'Base Value': np.full(len(positions), '', dtype=object),
+                'Comparison Value': np.full(len(positions), '', dtype=object),
+                'Base Row': merged['Base Row'].to_numpy(dtype=object)[positions] if status == 'Supprimée'
+                            else np.full(len(positions), '', dtype=object),
+                'Comp Row': merged['Comp Row'].to_numpy(dtype=object)[positions] if status == 'Ajoutée'
+                            else np.full(len(positions), '', dtype=object)
+            })
+
+        # Modified cells of the keys found on both sides, as a boolean matrix
+        matched = np.flatnonzero(in_base & in_comp)
+        base_rows = merged['Base Row'].to_numpy()[matched].astype(np.int64) - 2
+        comp_rows = merged['Comp Row'].to_numpy()[matched].astype(np.int64) - 2
+        # Columns as the outer join holds them: integers turn float when the other side has keys of its own
+        base_columns = {col: self._joined_column(base[col], (~in_base).any()) for col in common_value_cols}
+        comp_columns = {col: self._joined_column(comp[col], (~in_comp).any()) for col in common_value_cols}
+        changed = np.zeros((len(matched), len(common_value_cols)), dtype=bool)
+        for i, col in enumerate(common_value_cols):
+            base_codes, comp_codes, base_empty, comp_empty, base_str, comp_str, texts = self._shared_codes(
+                base_columns[col], comp_columns[col])
+            vb, vc = base_codes[base_rows], comp_codes[comp_rows]
+            differs = ~(base_empty[base_rows] & comp_empty[comp_rows]) & (vb != vc)
+            if texts is not None:
+                # Fuzzy match for strings
+                fuzzy = differs & base_str[base_rows] & comp_str[comp_rows]
+                if fuzzy.any():
+                    scores = process.cpdist(texts[vb[fuzzy]].tolist(), texts[vc[fuzzy]].tolist(),
+                                            scorer=fuzz.ratio, dtype=np.float64)
+                    differs[fuzzy] = scores < self.fuzzy_threshold
+            changed[:, i] = differs
+
+        # Changes of a key are reported from its first row having any
+        with_changes = changed.any(axis=1)
+        if with_changes.any():
+            keys = merged['key'].to_numpy(dtype=object)[matched]
+            reported = with_changes & ~pd.Series(keys).where(with_changes).duplicated().to_numpy()
+            cells = (pd.DataFrame(changed[reported], index=np.flatnonzero(reported))
+                     .rename_axis('matched').reset_index()
+                     .melt(id_vars='matched', var_name='column_index', value_name='changed'))
+            cells = cells[cells['changed']]
+            cell_rows = cells['matched'].to_numpy()
+            positions = matched[cell_rows]
+            column_index = cells['column_index'].to_numpy(dtype=np.int64)
+            # Values are only materialized for the modified cells
+            base_values = np.empty(len(positions), dtype=object)
+            comp_values = np.empty(len(positions), dtype=object)
+            for i, col in enumerate(common_value_cols):
+                cells_of_col = column_index == i
+                base_values[cells_of_col] = base_columns[col].iloc[base_rows[cell_rows[cells_of_col]]].to_numpy(dtype=object)
+                comp_values[cells_of_col] = comp_columns[col].iloc[comp_rows[cell_rows[cells_of_col]]].to_numpy(dtype=object)
+            records.append({
+                'position': positions,
+                'column_index': column_index,
+                'Key': keys[cell_rows],
+                'Status': np.full(len(positions), 'Modifiée', dtype=object),
+                'Column': np.array(common_value_cols, dtype=object)[column_index],
+                'Base Value': base_values,
+                'Comparison Value': comp_values,
+                'Base Row': merged['Base Row'].to_numpy(dtype=object)[positions],
+                'Comp Row': merged['Comp Row'].to_numpy(dtype=object)[positions]
+            })
+
+        # Records in merged row order, modified cells in column order
+        records = {name: np.concatenate([part[name] for part in records]) for name in records[0]}
+        if not len(records['position']):
+            return pd.DataFrame()
+        order = np.lexsort((records['column_index'], records['position']))
+        if records['Status'][order[0]] == 'Modifiée':
+            columns = ['Key', 'Column', 'Base Value', 'Comparison Value', 'Status', 'Base Row', 'Comp Row']
+        else:
+            columns = ['Key', 'Status', 'Column', 'Base Value', 'Comparison Value', 'Base Row', 'Comp Row']
+        return pd.DataFrame({name: records[name][order].tolist() for name in columns})
+
+    @staticmethod
+    def _joined_column(values, has_missing):
+        """Column values with the dtype an outer join gives them when the other side has rows of its own"""
+        if has_missing and pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return values.astype(np.float64)
+        return values
+
+    @staticmethod
+    def _shared_codes(base_values, comp_values):
+        """Encode the values of a column on both sides with one dictionary
+
+        Returns the codes of the base and comparison rows, whose equality
+        is the equality of the stripped text of the values, the masks of
+        their empty cells and of their string cells, and the text of each
+        code. Dates of two datetime columns are coded by their int64 epoch
+        value instead, with no texts (None) since they are never strings.
+        """
+        if pd.api.types.is_datetime64_dtype(base_values) and pd.api.types.is_datetime64_dtype(comp_values):
+            base_codes = base_values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            comp_codes = comp_values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            no_strings = np.zeros(0, dtype=bool)
+            return (base_codes, comp_codes, base_values.isna().to_numpy(), comp_values.isna().to_numpy(),
+                    no_strings, no_strings, None)
+
+        # Distinct values of each side, then one dictionary of their texts
+        sides = []
+        for values in (base_values, comp_values):
+            codes, uniques = pd.factorize(values.astype(object), use_na_sentinel=False)
+            uniques = list(uniques)
+            sides.append((codes, [str(value).strip() for value in uniques],
+                          np.array([pd.isna(value) for value in uniques], dtype=bool),
+                          np.array([isinstance(value, str) for value in uniques], dtype=bool)))
+        text_codes, texts = pd.factorize(pd.Series(sides[0][1] + sides[1][1], dtype=object))
+        base_text_codes, comp_text_codes = text_codes[:len(sides[0][1])], text_codes[len(sides[0][1]):]
+        texts = np.asarray(texts, dtype=object)
+
+        encoded = []
+        for (codes, unique_texts, unique_na, unique_str), unique_codes in ((sides[0], base_text_codes),
+                                                                          (sides[1], comp_text_codes)):
+            unique_empty = unique_na | (np.array(unique_texts, dtype=object) == '')
+            encoded.append((unique_codes[codes], unique_empty[codes], unique_str[codes]))
+        (base_codes, base_empty, base_str), (comp_codes, comp_empty, comp_str) = encoded
+        return base_codes, comp_codes, base_empty, comp_empty, base_str, comp_str, texts
 
     def find_duplicates(self, df, source='base'):
-        data = self.normalize_key(self.prepare(df)).reset_index(drop=True)
-        row_col = 'Base Row' if source == 'base' else 'Comp Row'
-        data[row_col] = data.index + 2
-        dup_keys = data['key'][data['key'].duplicated(keep=False)].unique()
+        return self.duplicate_rows(df, source).frame()
 
-        available_cols = [col for col in data.columns if col in data.columns]
-        return data[data['key'].isin(dup_keys)][available_cols].sort_values('key')
+    def duplicate_rows(self, df, source='base'):
+        """Duplicate rows of df as a DuplicateRows, indexed once per prepared frame"""
+        if self.prepared_frames is None:
+            return DuplicateRows(self.prepared(df), source)
+        return self.prepared_frames.duplicate_rows(df, source)
 
     def compare_with_multiple_methods(self, base_df, comp_df, mode='full'):
         """
@@ -247,6 +449,7 @@ class ComparisonEngine:
         print(f"Enhanced comparison mode: {mode}")
         original_value_cols = self.value_columns
         self.value_columns = dynamic_value_cols
+        preparing = self._start_preparing()
 
         try:
             # Disable date comparison as requested
@@ -259,20 +462,33 @@ class ComparisonEngine:
             if self.comparison_methods['exact']['enabled']:
                 methods_results['exact'] = self._exact_comparison(base_df, comp_df)
             
+            # Rows left to the similarity methods
+            residual = self.residual_matching and 'exact' in methods_results
+            if residual:
+                base_rest, comp_rest = self.residual_rows(base_df, comp_df, methods_results['exact']['differences'])
+            else:
+                base_rest, comp_rest = base_df, comp_df
+            
+            # Row pairs worth scoring by the similarity methods
+            candidates = self.find_candidate_pairs(base_rest, comp_rest)
+            scores_before = self.pair_scorer.stats()
+            
             # Method 2: Fuzzy matching with multiple algorithms
             if self.comparison_methods['fuzzy']['enabled']:
-                methods_results['fuzzy'] = self._fuzzy_comparison(base_df, comp_df)
+                methods_results['fuzzy'] = self._fuzzy_comparison(base_rest, comp_rest, candidates)
             
             # Method 3: Semantic comparison for text fields
             if self.comparison_methods['semantic']['enabled']:
-                methods_results['semantic'] = self._semantic_comparison(base_df, comp_df)
+                methods_results['semantic'] = self._semantic_comparison(base_rest, comp_rest, candidates)
             
             # Method 4: Phonetic comparison for names/codes
             if self.comparison_methods['phonetic']['enabled']:
-                methods_results['phonetic'] = self._phonetic_comparison(base_df, comp_df)
+                methods_results['phonetic'] = self._phonetic_comparison(base_rest, comp_rest, candidates)
+            
+            self._report_scores(scores_before)
             
             # Prioritize and filter results to get only the most relevant ones
-            final_results = self._prioritize_results(methods_results)
+            final_results = self._prioritize_results(methods_results, residual)
             
             # Return based on mode
             if mode == 'summary':
@@ -282,15 +498,73 @@ class ComparisonEngine:
                 
         finally:
             self.value_columns = original_value_cols
+            if preparing:
+                self._stop_preparing()
+
+    def residual_rows(self, base_df, comp_df, exact_differences):
+        """Get the base rows removed and the comparison rows added according to the exact join"""
+        removed, added = set(), set()
+        if not exact_differences.empty and 'Status' in exact_differences.columns:
+            removed = set(exact_differences.loc[exact_differences['Status'] == 'Supprimée', 'Key'])
+            added = set(exact_differences.loc[exact_differences['Status'] == 'Ajoutée', 'Key'])
+        base_rows = np.flatnonzero(self.prepared(base_df)['key'].isin(removed).to_numpy())
+        comp_rows = np.flatnonzero(self.prepared(comp_df)['key'].isin(added).to_numpy())
+        base_rest = base_df.iloc[base_rows]
+        comp_rest = comp_df.iloc[comp_rows]
+        if self.prepared_frames is not None:
+            # Residual rows keep the preparation of their whole frame
+            self.prepared_frames.derive(base_rest, base_df, base_rows)
+            self.prepared_frames.derive(comp_rest, comp_df, comp_rows)
+        print(f"Residual matching: {len(base_rest)} of {len(base_df)} base rows and "
+              f"{len(comp_rest)} of {len(comp_df)} comparison rows left to the similarity methods")
+        return base_rest, comp_rest
+
+    def find_candidate_pairs(self, base_df, comp_df):
+        """Get the (base rows, comparison rows) pairs the similarity methods score
 
-    def _prioritize_results(self, methods_results):
-        """Prioritize results to return only the most relevant differences"""
+        Returns None, meaning all pairs, when blocking is disabled. The pair
+        counts and pruning ratios are kept in blocking_stats.
+        """
+        self.blocking_stats = None
+        if not self.blocking.get('enabled', False):
+            return None
+        index = CandidateIndex(
+            self.blocking['rules'],
+            ngram_size=self.blocking.get('ngram_size', 3),
+            ngram_min_overlap=self.blocking.get('ngram_min_overlap', 0.6),
+            ngram_max_share=self.blocking.get('ngram_max_share', 0.05)
+        )
+        base = self.prepared(base_df)
+        comp = self.prepared(comp_df)
+        base_rows, comp_rows, self.blocking_stats = index.candidate_pairs(base, comp)
+        print(f"Blocking: {self.blocking_stats['candidate_pairs']} of {self.blocking_stats['all_pairs']} "
+              f"pairs kept ({self.blocking_stats['pruning_ratio']:.1%} pruned), by rule: {self.blocking_stats['rules']}")
+        return base_rows, comp_rows
+
+    def _report_scores(self, before):
+        """Keep and print the pair scorer memo hits and misses since before"""
+        after = self.pair_scorer.stats()
+        hits, misses = after['hits'] - before['hits'], after['misses'] - before['misses']
+        self.score_stats = {'hits': hits, 'misses': misses, 'entries': after['entries'],
+                            'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+        print(f"Score memo: {hits} hits, {misses} misses ({self.score_stats['hit_rate']:.1%} hit rate), "
+              f"{after['entries']} entries")
+
+    def _prioritize_results(self, methods_results, residual=False):
+        """Prioritize results to return only the most relevant differences
+
+        With residual set, the similarity methods only matched the keys the
+        exact join reported as added or removed, so those keys stay open to
+        a similarity match; keys with modifications are still skipped.
+        """
         exact_differences = methods_results.get('exact', {}).get('differences', pd.DataFrame())
 
         reported_keys = set()
         if not exact_differences.empty:
             for _, row in exact_differences.iterrows():
                 if 'Key' in row:
+                    if residual and row.get('Status') in ('Ajoutée', 'Supprimée'):
+                        continue
                     reported_keys.add(row['Key'])
         
         # Create a list to hold all prioritized differences
@@ -304,6 +578,9 @@ class ComparisonEngine:
                 all_differences.append(diff_dict)
 
         fuzzy_differences = methods_results.get('fuzzy', {}).get('differences', pd.DataFrame())
+        # Only close matches are reported: drop the others before walking the rows
+        if 'similarity' in fuzzy_differences.columns:
+            fuzzy_differences = fuzzy_differences[fuzzy_differences['similarity'] >= 90]
         if not fuzzy_differences.empty:
             for _, diff in fuzzy_differences.iterrows():
                 if 'similarity' in diff and diff['similarity'] >= 90:
@@ -321,6 +598,8 @@ class ComparisonEngine:
                     reported_keys.add(comp_key)
 
         semantic_differences = methods_results.get('semantic', {}).get('differences', pd.DataFrame())
+        if 'semantic_score' in semantic_differences.columns:
+            semantic_differences = semantic_differences[semantic_differences['semantic_score'] >= 70]
         if not semantic_differences.empty:
             for _, diff in semantic_differences.iterrows():
                 if 'semantic_score' in diff and diff['semantic_score'] >= 70:
@@ -365,75 +644,116 @@ class ComparisonEngine:
         """Exact matching method (your current implementation)"""
         return {
             'differences': self.find_differences(base_df, comp_df),
-            'duplicates_base': self.find_duplicates(base_df, source='base'),
-            'duplicates_comp': self.find_duplicates(comp_df, source='comp'),
+            'duplicates_base': self.duplicate_rows(base_df, source='base'),
+            'duplicates_comp': self.duplicate_rows(comp_df, source='comp'),
             'method': 'exact',
             'confidence': 1.0
         }
     
-    def _fuzzy_comparison(self, base_df, comp_df):
-        """Enhanced fuzzy matching with multiple algorithms"""
-        base = self.normalize_key(self.prepare(base_df)).reset_index(drop=True)
-        comp = self.normalize_key(self.prepare(comp_df)).reset_index(drop=True)
-        
-        # Multiple fuzzy algorithms
-        fuzzy_algorithms = {
-            'ratio': fuzz.ratio,
-            'partial_ratio': fuzz.partial_ratio,
-            'token_sort_ratio': fuzz.token_sort_ratio,
-            'token_set_ratio': fuzz.token_set_ratio
-        }
+    def _fuzzy_comparison(self, base_df, comp_df, candidates=None):
+        """Enhanced fuzzy matching with multiple algorithms
+
+        Every base row is scored against every comparison row, or only the
+        (base rows, comparison rows) pairs of candidates when given. Scores
+        are computed with rapidfuzz over distinct values: as cdist matrices
+        gathered for all row pairs one block of base rows at a time, or with
+        cpdist over the distinct value pairs of the candidates.
+        """
+        base = self.prepared(base_df)
+        comp = self.prepared(comp_df)
         
         fuzzy_results = []
+        columns = [col for col in self.value_columns if col in base.columns and col in comp.columns]
         
-        for _, base_row in base.iterrows():
-            for _, comp_row in comp.iterrows():
-                # Calculate similarities for each value column
-                similarities = {}
-                overall_similarity = 0
-                
-                for col in self.value_columns:
-                    if col in base.columns and col in comp.columns:
-                        base_val = str(base_row[col])
-                        comp_val = str(comp_row[col])
-                        
-                        # Calculate similarity using multiple algorithms
-                        col_similarities = {}
-                        for alg_name, alg_func in fuzzy_algorithms.items():
-                            col_similarities[alg_name] = alg_func(base_val, comp_val)
-                        
-                        # Average similarity for this column
-                        similarities[col] = sum(col_similarities.values()) / len(col_similarities)
-                        overall_similarity += similarities[col]
+        if columns and len(base) and len(comp):
+            base_keys = base['key'].to_numpy(dtype=object)
+            comp_keys = comp['key'].to_numpy(dtype=object)
+            
+            if candidates is None:
+                # Average similarity of each pair of distinct values, by column
+                column_scores = [self.pair_scorer.matrix_scores(self._fuzzy_score_matrix, base[col], comp[col])
+                                 for col in columns]
                 
-                # Average overall similarity
-                if similarities:
-                    overall_similarity /= len(similarities)
-                    
-                    # If similarity is between thresholds, it's a potential match
-                    if 50 <= overall_similarity < self.fuzzy_threshold:
-                        fuzzy_results.append({
-                            'base_key': base_row['key'],
-                            'comp_key': comp_row['key'],
-                            'similarity': overall_similarity,
-                            'column_similarities': similarities,
-                            'match_type': 'fuzzy_match'
-                        })
+                block_size = max(1, 4_000_000 // (len(comp) * len(columns)))
+                for block_start in range(0, len(base), block_size):
+                    block = slice(block_start, block_start + block_size)
+                    similarities = [scores[base_codes[block]][:, comp_codes]
+                                    for scores, base_codes, comp_codes in column_scores]
+                    rows, cols = np.nonzero(self._fuzzy_band(similarities))
+                    fuzzy_results.append(self._fuzzy_matches(
+                        base_keys[block_start + rows], comp_keys[cols], columns,
+                        [column_similarity[rows, cols] for column_similarity in similarities]))
+            else:
+                base_rows, comp_rows = candidates
+                # Each distinct pair of values found among the candidates is scored once
+                similarities = [self.pair_scorer.pair_scores('fuzzy', self._fuzzy_scores, base[col], comp[col],
+                                                             base_rows, comp_rows)
+                                for col in columns]
+                keep = self._fuzzy_band(similarities)
+                fuzzy_results.append(self._fuzzy_matches(
+                    base_keys[base_rows[keep]], comp_keys[comp_rows[keep]], columns,
+                    [column_similarity[keep] for column_similarity in similarities]))
         
+        fuzzy_results = [matches for matches in fuzzy_results if len(matches)]
         return {
-            'differences': pd.DataFrame(fuzzy_results),
-            'duplicates_base': self.find_duplicates(base_df, source='base'),
-            'duplicates_comp': self.find_duplicates(comp_df, source='comp'),
+            'differences': pd.concat(fuzzy_results, ignore_index=True) if fuzzy_results else pd.DataFrame(),
+            'duplicates_base': self.duplicate_rows(base_df, source='base'),
+            'duplicates_comp': self.duplicate_rows(comp_df, source='comp'),
             'method': 'fuzzy',
             'confidence': 0.8
         }
+
+    @classmethod
+    def _fuzzy_scores(cls, left, right):
+        """Average fuzzy score of each pair (left[i], right[i])"""
+        scores = np.zeros(len(left))
+        for alg_func in cls.FUZZY_ALGORITHMS.values():
+            scores += process.cpdist(left, right, scorer=alg_func, dtype=np.float64, workers=-1)
+        return scores / len(cls.FUZZY_ALGORITHMS)
+
+    @classmethod
+    def _fuzzy_score_matrix(cls, left, right):
+        """Average fuzzy score of every pair of left and right values"""
+        scores = np.zeros((len(left), len(right)))
+        for alg_func in cls.FUZZY_ALGORITHMS.values():
+            scores += process.cdist(left, right, scorer=alg_func, dtype=np.float64, workers=-1)
+        return scores / len(cls.FUZZY_ALGORITHMS)
+
+    def _fuzzy_band(self, similarities):
+        """Mask of the pairs whose average column similarity makes them potential matches"""
+        overall = np.zeros_like(similarities[0])
+        for column_similarity in similarities:
+            overall += column_similarity
+        overall /= len(similarities)
+        # If similarity is between thresholds, it's a potential match
+        return (overall >= 50) & (overall < self.fuzzy_threshold)
+
+    @staticmethod
+    def _fuzzy_matches(base_keys, comp_keys, columns, similarities):
+        """Build fuzzy match rows from the keys and column similarities of matched pairs"""
+        overall = np.zeros(len(base_keys))
+        for column_similarity in similarities:
+            overall += column_similarity
+        overall /= len(columns)
+        column_values = zip(*(column_similarity.tolist() for column_similarity in similarities))
+        return pd.DataFrame({
+            'base_key': base_keys,
+            'comp_key': comp_keys,
+            'similarity': overall,
+            'column_similarities': [dict(zip(columns, values)) for values in column_values],
+            'match_type': 'fuzzy_match'
+        })
     
-    def _semantic_comparison(self, base_df, comp_df):
-        """Semantic comparison for text fields"""
+    def _semantic_comparison(self, base_df, comp_df, candidates=None):
+        """Semantic comparison for text fields
+
+        Scores every pair of rows, or only the (base rows, comparison rows)
+        pairs of candidates when given.
+        """
         try:
             # Simple semantic comparison using word overlap
-            base = self.normalize_key(self.prepare(base_df)).reset_index(drop=True)
-            comp = self.normalize_key(self.prepare(comp_df)).reset_index(drop=True)
+            base = self.prepared(base_df)
+            comp = self.prepared(comp_df)
             
             semantic_results = []
             
@@ -442,34 +762,49 @@ class ComparisonEngine:
                           if col in base.columns and col in comp.columns 
                           and col in ['Commentaire', 'Libelle', 'Description']]
             
-            for _, base_row in base.iterrows():
-                for _, comp_row in comp.iterrows():
-                    semantic_scores = {}
-                    
-                    for col in text_columns:
-                        base_text = str(base_row[col]).lower()
-                        comp_text = str(comp_row[col]).lower()
-                        
-                        # Word overlap semantic similarity
-                        base_words = set(base_text.split())
-                        comp_words = set(comp_text.split())
-                        
-                        if base_words or comp_words:
-                            intersection = len(base_words & comp_words)
-                            union = len(base_words | comp_words)
-                            jaccard_similarity = intersection / union if union > 0 else 0
-                            semantic_scores[col] = jaccard_similarity * 100
+            threshold = 30  # Threshold for semantic similarity
+            
+            # Word sets of each row, by column
+            base_words = {col: [set(str(value).lower().split()) for value in base[col]] for col in text_columns}
+            comp_words = {col: [set(str(value).lower().split()) for value in comp[col]] for col in text_columns}
+            base_keys = base['key'].tolist()
+            comp_keys = comp['key'].tolist()
+            
+            if self.semantic_index.get('enabled', False) or candidates is not None:
+                if self.semantic_index.get('enabled', False):
+                    base_rows, comp_rows = self._semantic_pairs(base_words, comp_words, len(comp), threshold, candidates)
+                else:
+                    base_rows, comp_rows = candidates
+                semantic_results = self._semantic_matches(base_words, comp_words, base_keys, comp_keys,
+                                                          base_rows, comp_rows, threshold)
+                pairs = []
+            else:
+                pairs = itertools.product(range(len(base)), range(len(comp)))
+            
+            for i, j in pairs:
+                semantic_scores = {}
+                
+                for col in text_columns:
+                    # Word overlap semantic similarity
+                    words_base = base_words[col][i]
+                    words_comp = comp_words[col][j]
                     
-                    if semantic_scores:
-                        avg_semantic = sum(semantic_scores.values()) / len(semantic_scores)
-                        if avg_semantic > 30:  # Threshold for semantic similarity
-                            semantic_results.append({
-                                'base_key': base_row['key'],
-                                'comp_key': comp_row['key'],
-                                'semantic_score': avg_semantic,
-                                'column_scores': semantic_scores,
-                                'match_type': 'semantic_match'
-                            })
+                    if words_base or words_comp:
+                        intersection = len(words_base & words_comp)
+                        union = len(words_base | words_comp)
+                        jaccard_similarity = intersection / union if union > 0 else 0
+                        semantic_scores[col] = jaccard_similarity * 100
+                
+                if semantic_scores:
+                    avg_semantic = sum(semantic_scores.values()) / len(semantic_scores)
+                    if avg_semantic > threshold:
+                        semantic_results.append({
+                            'base_key': base_keys[i],
+                            'comp_key': comp_keys[j],
+                            'semantic_score': avg_semantic,
+                            'column_scores': semantic_scores,
+                            'match_type': 'semantic_match'
+                        })
             
             return {
                 'differences': pd.DataFrame(semantic_results),
@@ -489,11 +824,85 @@ class ComparisonEngine:
                 'confidence': 0.0
             }
     
-    def _phonetic_comparison(self, base_df, comp_df):
-        """Phonetic comparison for names and codes"""
+    def _semantic_pairs(self, base_words, comp_words, comp_len, threshold, candidates=None):
+        """Get the (base rows, comparison rows) pairs worth a semantic score, sorted by base row
+
+        A pair passes the threshold on average only if it passes it on one
+        column, so the pairs are the ones the token index finds on any
+        column. When candidates are given, only they are checked.
+        """
+        index = SemanticIndex(
+            threshold / 100,
+            recall=self.semantic_index.get('recall', 1.0),
+            num_perm=self.semantic_index.get('num_perm', 128),
+            seed=self.semantic_index.get('seed', 0)
+        )
+        codes = [np.empty(0, dtype=np.int64)]
+        for col in base_words:
+            if candidates is None:
+                base_rows, comp_rows = index.similar_pairs(base_words[col], comp_words[col])
+            else:
+                base_rows, comp_rows = index.similar_pairs(base_words[col], comp_words[col], *candidates)
+            codes.append(base_rows * comp_len + comp_rows)
+            print(f"Semantic index on {col}: {index.stats['candidates']} candidate pairs of "
+                  f"{index.stats['base_sets']}x{index.stats['comp_sets']} distinct texts, {index.stats['pairs']} kept")
+        codes = np.unique(np.concatenate(codes))
+        return codes // comp_len, codes % comp_len
+
+    def _semantic_matches(self, base_words, comp_words, base_keys, comp_keys, base_rows, comp_rows, threshold):
+        """Semantic matches among the (base rows, comparison rows) pairs, scored through the pair scorer"""
+        scores = {}
+        for col in base_words:
+            # Word sets stand for their texts, so texts made of the same words are scored once
+            base_texts = [' '.join(sorted(words)) for words in base_words[col]]
+            comp_texts = [' '.join(sorted(words)) for words in comp_words[col]]
+            scores[col] = self.pair_scorer.pair_scores('jaccard', self._jaccard_scores, base_texts, comp_texts,
+                                                       base_rows, comp_rows)
+        
+        # Average over the columns having words on either side
+        total = np.zeros(len(base_rows))
+        count = np.zeros(len(base_rows), dtype=np.int64)
+        for col_scores in scores.values():
+            active = ~np.isnan(col_scores)
+            total[active] += col_scores[active]
+            count += active
+        average = np.divide(total, count, out=np.zeros(len(base_rows)), where=count > 0)
+        
+        semantic_results = []
+        column_scores = {col: col_scores.tolist() for col, col_scores in scores.items()}
+        for k in np.flatnonzero((count > 0) & (average > threshold)).tolist():
+            semantic_results.append({
+                'base_key': base_keys[base_rows[k]],
+                'comp_key': comp_keys[comp_rows[k]],
+                'semantic_score': float(average[k]),
+                'column_scores': {col: values[k] for col, values in column_scores.items() if not np.isnan(values[k])},
+                'match_type': 'semantic_match'
+            })
+        return semantic_results
+
+    @staticmethod
+    def _jaccard_scores(left, right):
+        """Word overlap similarity (0-100) of each pair of space-separated word sets, NaN when both are empty"""
+        scores = []
+        for left_text, right_text in zip(left, right):
+            words_base, words_comp = set(left_text.split()), set(right_text.split())
+            if words_base or words_comp:
+                scores.append(len(words_base & words_comp) / len(words_base | words_comp) * 100)
+            else:
+                scores.append(np.nan)
+        return scores
+
+    def _phonetic_comparison(self, base_df, comp_df, candidates=None):
+        """Phonetic comparison for names and codes
+
+        Pairs rows sharing the Soundex code of a column with differing
+        values, through a join on the codes of each column, among every
+        pair of rows or only the (base rows, comparison rows) pairs of
+        candidates when given.
+        """
         try:           
-            base = self.normalize_key(self.prepare(base_df)).reset_index(drop=True)
-            comp = self.normalize_key(self.prepare(comp_df)).reset_index(drop=True)
+            base = self.prepared(base_df)
+            comp = self.prepared(comp_df)
             
             phonetic_results = []
             
@@ -502,35 +911,62 @@ class ComparisonEngine:
                           if col in base.columns and col in comp.columns 
                           and col in ['Serie', 'Locomotive', 'CodeOp']]
             
-            for _, base_row in base.iterrows():
-                for _, comp_row in comp.iterrows():
-                    phonetic_matches = {}
-                    
-                    for col in name_columns:
-                        base_val = str(base_row[col])
-                        comp_val = str(comp_row[col])
-                        
-                        # Soundex comparison
-                        try:
-                            base_soundex = soundex.soundex(base_val)
-                            comp_soundex = soundex.soundex(comp_val)
-                            
-                            if base_soundex == comp_soundex and base_val != comp_val:
-                                phonetic_matches[col] = {
-                                    'base_value': base_val,
-                                    'comp_value': comp_val,
-                                    'soundex_code': base_soundex
-                                }
-                        except:
-                            pass
-                    
-                    if phonetic_matches:
+            # Matching (pair, column) cells of each column
+            matches = []
+            for col_index, col in enumerate(name_columns):
+                base_values = pd.Series([str(value) for value in base[col]], dtype=object)
+                comp_values = pd.Series([str(value) for value in comp[col]], dtype=object)
+                if candidates is None:
+                    # Distinct values sharing a code, then the rows holding them
+                    base_buckets = pd.DataFrame({'base_value': base_values.unique()})
+                    comp_buckets = pd.DataFrame({'comp_value': comp_values.unique()})
+                    base_buckets['code'] = self.pair_scorer.value_results('soundex', self._soundex_code,
+                                                                          base_buckets['base_value'])
+                    comp_buckets['code'] = self.pair_scorer.value_results('soundex', self._soundex_code,
+                                                                          comp_buckets['comp_value'])
+                    value_pairs = base_buckets.dropna(subset=['code']).merge(comp_buckets.dropna(subset=['code']), on='code')
+                    value_pairs = value_pairs[value_pairs['base_value'] != value_pairs['comp_value']]
+                    pairs = (value_pairs
+                             .merge(pd.DataFrame({'base': np.arange(len(base)), 'base_value': base_values}), on='base_value')
+                             .merge(pd.DataFrame({'comp': np.arange(len(comp)), 'comp_value': comp_values}), on='comp_value'))
+                else:
+                    # Codes of the candidate rows compared directly
+                    base_codes = self.pair_scorer.value_results('soundex', self._soundex_code, base_values)
+                    comp_codes = self.pair_scorer.value_results('soundex', self._soundex_code, comp_values)
+                    base_rows, comp_rows = candidates
+                    pairs = pd.DataFrame({'base': base_rows, 'comp': comp_rows,
+                                          'base_value': base_values.to_numpy(dtype=object)[base_rows],
+                                          'comp_value': comp_values.to_numpy(dtype=object)[comp_rows],
+                                          'code': base_codes[base_rows]})
+                    pairs = pairs[pd.notna(pairs['code']).to_numpy() & (base_codes[base_rows] == comp_codes[comp_rows])
+                                  & (pairs['base_value'] != pairs['comp_value']).to_numpy()]
+                pairs = pairs.assign(pair=pairs['base'].to_numpy(dtype=np.int64) * len(comp) + pairs['comp'].to_numpy(),
+                                     column=col_index)
+                matches.append(pairs[['pair', 'column', 'base_value', 'comp_value', 'code']])
+            
+            if matches:
+                # One result per pair, its matching columns in column order
+                matches = pd.concat(matches, ignore_index=True).sort_values(['pair', 'column'], kind='stable')
+                base_keys = base['key'].tolist()
+                comp_keys = comp['key'].tolist()
+                previous = None
+                for pair, col_index, base_value, comp_value, code in zip(
+                        matches['pair'].tolist(), matches['column'].tolist(), matches['base_value'].tolist(),
+                        matches['comp_value'].tolist(), matches['code'].tolist()):
+                    if pair != previous:
+                        previous = pair
+                        phonetic_matches = {}
                         phonetic_results.append({
-                            'base_key': base_row['key'],
-                            'comp_key': comp_row['key'],
+                            'base_key': base_keys[pair // len(comp)],
+                            'comp_key': comp_keys[pair % len(comp)],
                             'phonetic_matches': phonetic_matches,
                             'match_type': 'phonetic_match'
                         })
+                    phonetic_matches[name_columns[col_index]] = {
+                        'base_value': base_value,
+                        'comp_value': comp_value,
+                        'soundex_code': code
+                    }
             
             return {
                 'differences': pd.DataFrame(phonetic_results),
@@ -550,6 +986,14 @@ class ComparisonEngine:
                 'confidence': 0.0
             }
         
+    @staticmethod
+    def _soundex_code(value):
+        """Soundex code of a value, None if it has none"""
+        try:
+            return soundex.soundex(value)
+        except Exception:
+            return None
+
     def _aggregate_results(self, methods_results):
         """Aggregate results from multiple methods with confidence weighting"""
         aggregated = {
@@ -614,7 +1058,14 @@ class ComparisonEngine:
             return 'VERY_LOW'
     
     def _create_enhanced_summary(self, aggregated_results):
-        """Create enhanced summary with method breakdown"""
+        """Create enhanced summary with method breakdown
+
+        Totals count what full mode reports: the simplified, deduplicated
+        differences and the duplicates found by the exact method. Duplicate
+        counts are read from the duplicate indexes, without materializing
+        the duplicate rows. Prioritized results carry no consensus, its
+        counts are then 0.
+        """
         method_breakdown = {}
         
         for method_name, results in aggregated_results['method_breakdown'].items():
@@ -625,17 +1076,19 @@ class ComparisonEngine:
                 'confidence': results['confidence']
             }
         
+        differences = self.deduplicate_by_week(self.get_simplified_results(aggregated_results['differences']))
+        consensus_results = aggregated_results.get('consensus_results', [])
         return {
-            'total_diffs': len(aggregated_results['differences']),
-            'total_dups_base': sum(len(r['duplicates_base']) for r in aggregated_results['method_breakdown'].values()),
-            'total_dups_comp': sum(len(r['duplicates_comp']) for r in aggregated_results['method_breakdown'].values()),
+            'total_diffs': len(differences),
+            'total_dups_base': len(aggregated_results['duplicates_base']),
+            'total_dups_comp': len(aggregated_results['duplicates_comp']),
             'method_breakdown': method_breakdown,
-            'consensus_count': len(aggregated_results['consensus_results']),
-            'high_confidence_count': len([r for r in aggregated_results['consensus_results'] 
+            'consensus_count': len(consensus_results),
+            'high_confidence_count': len([r for r in consensus_results 
                                         if r['confidence_level'] == 'HIGH']),
-            'medium_confidence_count': len([r for r in aggregated_results['consensus_results'] 
+            'medium_confidence_count': len([r for r in consensus_results 
                                           if r['confidence_level'] == 'MEDIUM']),
-            'low_confidence_count': len([r for r in aggregated_results['consensus_results'] 
+            'low_confidence_count': len([r for r in consensus_results 
                                        if r['confidence_level'] == 'LOW'])
         }
     
@@ -653,6 +1106,11 @@ class ComparisonEngine:
             # Full mode - include everything
             dups_base = aggregated_results['duplicates_base']
             dups_comp = aggregated_results['duplicates_comp']
+            # Duplicates of the methods are only materialized here
+            if isinstance(dups_base, DuplicateRows):
+                dups_base = dups_base.frame()
+            if isinstance(dups_comp, DuplicateRows):
+                dups_comp = dups_comp.frame()
             return simplified_differences, dups_base, dups_comp
     
     def get_simplified_results(self, results_df):
@@ -735,20 +1193,29 @@ class ComparisonEngine:
     def compare(self, base_df, comp_df, mode='full'):
         """
         Main comparison method - routes to enhanced or standard comparison
+
+        Both share one preparation scope, so the fallback reuses the frames
+        the enhanced comparison already prepared.
         """
+        preparing = self._start_preparing()
         try:
-            # Try enhanced comparison first
-            return self.compare_with_multiple_methods(base_df, comp_df, mode)
-        except Exception as e:
-            print(f"Enhanced comparison failed, falling back to standard: {e}")
-            # Fallback to your existing implementation
-            return self._standard_comparison(base_df, comp_df, mode)
+            try:
+                # Try enhanced comparison first
+                return self.compare_with_multiple_methods(base_df, comp_df, mode)
+            except Exception as e:
+                print(f"Enhanced comparison failed, falling back to standard: {e}")
+                # Fallback to your existing implementation
+                return self._standard_comparison(base_df, comp_df, mode)
+        finally:
+            if preparing:
+                self._stop_preparing()
     
     def _standard_comparison(self, base_df, comp_df, mode='full'):
         """Comparison logic as fallback"""
         dynamic_value_cols = self.set_dynamic_value_columns(base_df, comp_df)
         original_value_cols = self.value_columns
         self.value_columns = dynamic_value_cols
+        preparing = self._start_preparing()
 
         try:
             diffs = pd.DataFrame()
@@ -758,8 +1225,8 @@ class ComparisonEngine:
             if mode == 'summary':
                 diffs = self.find_differences(base_df, comp_df)
                 diffs = self.deduplicate_by_week(diffs)  # Add deduplication
-                dups_base = self.find_duplicates(base_df, source='base')
-                dups_comp = self.find_duplicates(comp_df, source='comp')
+                dups_base = self.duplicate_rows(base_df, source='base')
+                dups_comp = self.duplicate_rows(comp_df, source='comp')
                 
                 # Return only summary statistics
                 summary = {
@@ -781,6 +1248,8 @@ class ComparisonEngine:
     
         finally:
             self.value_columns = original_value_cols
+            if preparing:
+                self._stop_preparing()
     
     def filter_by_week_range(self, df, target_weeks=None):
         """Filter DataFrame to only include specified week numbers"""
@@ -862,6 +1331,37 @@ class ComparisonEngine:
         print(f"Deduplication: {len(results_df)} -> {len(deduplicated)} results")
         return deduplicated
 
+    @staticmethod
+    def _match_comparison_sheet(sheet, sheet_names, site_mappings):
+        """Find the comparison sheet matching a selected sheet, or use the first one"""
+        if sheet in sheet_names:
+            return sheet
+        # Try to match by site code
+        if site_mappings:
+            for code, mapped_sheet in site_mappings.items():
+                if mapped_sheet == sheet:
+                    matched_sheets = [s for s in sheet_names if code in s]
+                    if matched_sheets:
+                        return matched_sheets[0]
+        # If still no match, use first sheet
+        return sheet_names[0]
+
+    @staticmethod
+    def _workbook_sheet_names(ExcelProcessor, file_path):
+        """Sheet names of a workbook, or None if it cannot be read
+
+        The xlsx container is probed without parsing any cell; other formats
+        fall back to opening the workbook.
+        """
+        sheets = ExcelProcessor.probe_workbook(file_path)
+        if sheets is not None:
+            return [sheet['name'] for sheet in sheets]
+        processor = ExcelProcessor(file_path)
+        try:
+            return processor.sheet_names if processor.load_workbook() else None
+        finally:
+            processor.close()
+
     @staticmethod
     def run_comparison(session_data, ExcelProcessor, safe_convert_func):
         settings = session_data['comparison_settings']
@@ -874,11 +1374,34 @@ class ComparisonEngine:
         all_results = {}
         total = {'diffs': 0, 'dups': 0, 'cells': 0}
         start = time()
-        
+
+        # Resolve the comparison sheet matched with each selected sheet
+        base_path = settings['base_file'].file_path
+        base_loaded = ComparisonEngine._workbook_sheet_names(ExcelProcessor, base_path) is not None
+        comp_sheet_names = {}
+        for comp_info in settings['comparison_files']:
+            if comp_info.file_path not in comp_sheet_names:
+                comp_sheet_names[comp_info.file_path] = \
+                    ComparisonEngine._workbook_sheet_names(ExcelProcessor, comp_info.file_path) or []
+
+        target_sheets = {}
         for sheet in settings['selected_sheets']:
-            bp = ExcelProcessor(settings['base_file'].file_path)
-            if not bp.load_workbook(): continue
-            df_base = bp.get_sheet_data(sheet, is_base_file=True, use_dynamic_detection=True)
+            for comp_info in settings['comparison_files']:
+                sheet_names = comp_sheet_names[comp_info.file_path]
+                if sheet_names:
+                    target_sheets[(sheet, comp_info.file_path)] = ComparisonEngine._match_comparison_sheet(
+                        sheet, sheet_names, settings['site_mappings'])
+
+        # Parse every needed sheet up front, in parallel
+        tasks = []
+        if base_loaded:
+            tasks += [(base_path, sheet, True) for sheet in settings['selected_sheets']]
+        tasks += [(path, target, False) for (_, path), target in target_sheets.items()]
+        frames = dict(ExcelProcessor.load_sheets(tasks))
+
+        for sheet in settings['selected_sheets']:
+            if not base_loaded: continue
+            df_base = frames[(base_path, sheet, True)]
             if df_base.empty:
                 all_results[sheet] = []
                 continue
@@ -899,26 +1422,10 @@ class ComparisonEngine:
                 
             sheet_out = []
             for comp_info in settings['comparison_files']:
-                cp = ExcelProcessor(comp_info.file_path)
-                if not cp.load_workbook() or not cp.sheet_names: continue
-                
-                # Find matching sheet or use first available
-                target_sheet = sheet
-                if target_sheet not in cp.sheet_names and cp.sheet_names:
-                    # Try to match by site code
-                    if settings['site_mappings']:
-                        for code, mapped_sheet in settings['site_mappings'].items():
-                            if mapped_sheet == sheet and any(code in s for s in cp.sheet_names):
-                                matched_sheets = [s for s in cp.sheet_names if code in s]
-                                if matched_sheets:
-                                    target_sheet = matched_sheets[0]
-                                    break
-                    
-                    # If still no match, use first sheet
-                    if target_sheet not in cp.sheet_names:
-                        target_sheet = cp.sheet_names[0]
+                target_sheet = target_sheets.get((sheet, comp_info.file_path))
+                if target_sheet is None: continue
                 
-                df_comp = cp.get_sheet_data(target_sheet, is_base_file=False, use_dynamic_detection=True)
+                df_comp = frames[(comp_info.file_path, target_sheet, False)]
                 if df_comp.empty: continue
                 
                 # Check if comparison file has week column
@@ -953,6 +1460,7 @@ class ComparisonEngine:
                         'comparison_file': comp_info.file_name,
                         'base_rows': int(len(df_base)),
                         'comp_rows': int(len(df_comp)),
+                        'blocking': engine.blocking_stats,
                         'summary': file_summary
                     })
                 else:
@@ -974,7 +1482,8 @@ class ComparisonEngine:
                         'duplicates_comp': safe_convert_func(dups_comp.fillna('').to_dict('records')),
                         'duplicates_comp_columns': safe_convert_func(dups_comp.columns.tolist()),
                         'base_rows': int(len(df_base)),
-                        'comp_rows': int(len(df_comp))
+                        'comp_rows': int(len(df_comp)),
+                        'blocking': engine.blocking_stats
                     })
             
             all_results[sheet] = sheet_out
@@ -1,31 +1,856 @@
 import pandas as pd
 import os
+import sys
 import numpy as np
 import re
+import zipfile
+import hashlib
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pandas.io.parsers import TextParser
+from pandas.errors import EmptyDataError
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+if getattr(sys, 'frozen', False):
+    from sheet_cache import SheetCache
+    from layout_registry import LayoutRegistry
+    from xlsx_reader import XlsxReader, xlsx_sheet_parts, XLSX_MAIN_NS, column_index
+else:
+    from src.core.sheet_cache import SheetCache
+    from src.core.layout_registry import LayoutRegistry
+    from src.core.xlsx_reader import XlsxReader, xlsx_sheet_parts, XLSX_MAIN_NS, column_index
+
+# Cell values pandas reads as missing (default na_values of the Excel parser)
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+# Text left in cleaned cells that stands for a missing value
+NULL_MARKERS = ['', 'nan', 'NaT', 'None', 'NA', 'N/A']
+EXCEL_ERROR_CODES = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'}
+
+def get_setting(key, default=None):
+    """Read a setting from the application config, falling back to default"""
+    try:
+        if getattr(sys, 'frozen', False):
+            from config import config
+        else:
+            from src.utils.config import config
+        return config.get(key, default)
+    except ImportError:
+        return default
+
+_sheet_cache = None
+
+def get_sheet_cache():
+    """Get the process-wide sheet cache, or None when it is disabled"""
+    global _sheet_cache
+    if not get_setting("excel_processing.sheet_cache", True):
+        return None
+    if _sheet_cache is None:
+        try:
+            _sheet_cache = SheetCache(
+                get_setting("excel_processing.sheet_cache_dir", None),
+                get_setting("excel_processing.sheet_cache_max_size_mb", 500)
+            )
+        except OSError as e:
+            print(f"Sheet cache disabled: {str(e)}")
+            return None
+    return _sheet_cache
+
+_layout_registry = None
+
+def get_layout_registry():
+    """Get the process-wide layout registry, or None when it is disabled"""
+    global _layout_registry
+    if not get_setting("excel_processing.layout_registry", True):
+        return None
+    if _layout_registry is None:
+        try:
+            _layout_registry = LayoutRegistry(get_setting("excel_processing.layout_registry_path", None))
+        except OSError as e:
+            print(f"Layout registry disabled: {str(e)}")
+            return None
+    return _layout_registry
+
+def make_column_names(header_values):
+    """Name columns from raw header cells the way pandas does (Unnamed: i, name.1)"""
+    names = []
+    seen = {}
+    for i, value in enumerate(header_values):
+        if value is None or value == '':
+            name = f"Unnamed: {i}"
+        elif isinstance(value, float) and value.is_integer():
+            name = int(value)
+        else:
+            name = value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def row_width(row):
+    """Get the length of a row of cell values once trailing empty cells are dropped"""
+    width = len(row)
+    while width and (row[width - 1] is None or row[width - 1] == ''):
+        width -= 1
+    return width
+
+def convert_cell(value):
+    """Convert a raw openpyxl cell value the way the pandas Excel reader does"""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value in EXCEL_ERROR_CODES:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def build_typed_column(values):
+    """Convert the raw cell values of one column into a typed array
+
+    Mirrors the type inference of the pandas Excel parser: missing markers
+    become NaN, numeric columns become int64/float64, boolean and datetime
+    columns get their own dtype and anything else stays object. Booleans
+    only keep their dtype in full columns: with missing cells or numbers
+    they count as 1 and 0, like in the parser.
+    """
+    cleaned = np.array(
+        [np.nan if v is None or (isinstance(v, str) and (v in NA_STRINGS or v in EXCEL_ERROR_CODES)) else v
+         for v in values],
+        dtype=object
+    )
+    present = [v for v in cleaned if not (isinstance(v, float) and np.isnan(v))]
+    if len(cleaned) == 0:
+        return cleaned
+    if not present:
+        return np.full(len(cleaned), np.nan)
+
+    if len(present) == len(cleaned) and all(isinstance(v, (bool, np.bool_)) for v in present):
+        return cleaned.astype(bool)
+
+    try:
+        return pd.to_numeric(cleaned)
+    except (ValueError, TypeError):
+        pass
+
+    if all(isinstance(v, datetime) for v in present):
+        return pd.to_datetime(cleaned).to_numpy()
+
+    return cleaned
+
+def clean_columns(df):
+    """Turn every column into stripped text with null markers blanked, in one pass per column
+
+    Datetime columns are kept as they are; any other column is converted to
+    text with '' for missing values.
+    """
+    cleaned = {}
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            cleaned[i] = values
+            continue
+        if values.dtype != object or pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+            # Columns repeat a handful of values: clean each distinct value once
+            codes, uniques = pd.factorize(values)
+            texts = [str(value).strip() for value in uniques]
+            texts = np.array([('' if text in NULL_MARKERS else text) for text in texts] + [''], dtype=object)
+            cleaned[i] = pd.Series(texts[codes], index=df.index)  # Code -1 (missing) maps to ''
+        else:
+            missing = values.isna()
+            text = values.map(str).str.strip()
+            cleaned[i] = text.mask(missing | text.isin(NULL_MARKERS), '')
+
+    result = pd.DataFrame(cleaned, index=df.index)
+    result.columns = df.columns
+    return result
+
+def meaningful_rows(df, columns=None):
+    """Boolean mask of the rows holding at least one meaningful value in columns
+
+    Expects a frame cleaned by clean_columns, where text columns hold ''
+    for missing values and datetime columns hold NaT.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    positions = range(df.shape[1]) if columns is None else [df.columns.get_loc(col) for col in columns]
+    for i in positions:
+        values = df.iloc[:, i]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            mask |= values.notna().to_numpy()
+        else:
+            mask |= (values.to_numpy() != '')
+    return mask
+
+# Low-cardinality planning columns stored as categoricals by compact_frame
+COMPACT_COLUMNS = [
+    'Site', 'Serie', 'CodeOp', 'Semaine de programmation',
+    'STF', 'SERIE', 'Acceptée', 'N° Semaine Ou Reliquat'
+]
+
+def compact_frame(df, columns=COMPACT_COLUMNS):
+    """Shrink a standardized frame: repeated text as categoricals, numbers downcast
+
+    Text columns listed in columns become categoricals when they repeat
+    their values, and integer columns take the smallest integer type that
+    holds them. Datetime and other text columns are left as they are.
+    """
+    result = df.copy(deep=False)
+    for i, col in enumerate(df.columns):
+        values = df.iloc[:, i]
+        if values.dtype == object:
+            if col in columns and values.nunique(dropna=False) <= len(values) // 2:
+                category = values.astype('category')
+                # '' is the blank marker of standardized frames, so fillna('') stays valid
+                if '' not in category.cat.categories:
+                    category = category.cat.add_categories('')
+                result.isetitem(i, category)
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            result.isetitem(i, pd.to_numeric(values, downcast='integer'))
+    return result
+
+# Explicit formats tried when parsing date columns, day-first before month-first
+DATE_FORMATS = [
+    '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y',
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d',
+    '%d.%m.%Y', '%d/%m/%y', '%d-%m-%y', '%m/%d/%Y', '%m/%d/%Y %H:%M:%S'
+]
+DATE_PATTERN = re.compile(r'\d{1,4}[/-]\d{1,2}[/-]\d{1,4}')
+# Excel serial day numbers between 1927 and 2173, stored as text by clean_columns
+EXCEL_SERIAL_PATTERN = re.compile(r'^\d{5}(\.\d+)?$')
+EXCEL_SERIAL_FORMAT = 'excel_serial'
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+def infer_date_format(texts, sample_size=500):
+    """Pick the date format parsing the most values of an evenly spaced sample
+
+    Returns EXCEL_SERIAL_FORMAT when only Excel serial numbers are found,
+    or None when nothing in the sample looks like a date.
+    """
+    if len(texts) > sample_size:
+        texts = texts[np.linspace(0, len(texts) - 1, sample_size).astype(int)]
+
+    best_format, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = pd.to_datetime(texts, format=fmt, errors='coerce').notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+
+    if best_format is None and any(EXCEL_SERIAL_PATTERN.match(t) for t in texts):
+        return EXCEL_SERIAL_FORMAT
+    return best_format
+
+def convert_dates(texts, fmt):
+    """Convert date strings with one explicit format, unparsable values become NaT"""
+    if fmt == EXCEL_SERIAL_FORMAT:
+        texts = pd.Series(texts, dtype=object)
+        serials = pd.to_numeric(texts.where(texts.str.match(EXCEL_SERIAL_PATTERN.pattern)), errors='coerce')
+        return pd.DatetimeIndex(pd.to_datetime(serials, unit='D', origin=EXCEL_EPOCH).dt.round('s'))
+    return pd.DatetimeIndex(pd.to_datetime(texts, format=fmt, errors='coerce'))
+
+def parse_date_column(values, require_dates=False):
+    """Convert a column to datetime64 with explicit formats inferred from its values
+
+    Each distinct value is parsed once: the format inferred from a sample is
+    applied in one vectorized call, then inference repeats on the values it
+    left unparsed. Returns the converted column and the formats used, or
+    (None, []) if require_dates is set and no value looks like a date.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, []
+
+    codes, uniques = pd.factorize(values)
+    texts = np.array([str(v).strip() for v in uniques], dtype=object)
+    present = ~np.isin(texts, NULL_MARKERS)
+
+    if require_dates:
+        candidates = texts[present]
+        if not (any(DATE_PATTERN.search(t) for t in candidates) or
+                (len(candidates) and all(EXCEL_SERIAL_PATTERN.match(t) for t in candidates))):
+            return None, []
+
+    parsed = np.full(len(texts) + 1, np.datetime64('NaT'), dtype='datetime64[ns]')
+    pending = present.copy()
+    formats = []
+    while pending.any():
+        fmt = infer_date_format(texts[pending])
+        if fmt is None:
+            break
+        positions = np.flatnonzero(pending)
+        converted = convert_dates(texts[positions], fmt)
+        valid = converted.notna()
+        parsed[positions[valid]] = converted[valid].to_numpy()
+        pending[positions[valid]] = False
+        formats.append(fmt)
+
+    # Missing values have code -1 and pick the trailing NaT
+    return pd.Series(parsed[codes], index=values.index, name=values.name), formats
+
+# Time of day written as HH:MM[:SS], alone or after a date
+TIME_OF_DAY_PATTERN = r'(?:^|[ T])(\d{1,2}):(\d{2})(?::\d{2}(?:\.\d+)?)?$'
+DATETIME_TEXT_PATTERN = r'^\d{4}-\d{2}-\d{2}[ T](\d{1,2}:\d{2}:\d{2})'
+# Minutes value of cells holding no valid time of day
+NO_TIME = -1
+
+def time_to_minutes(values):
+    """Convert a time column to int32 minutes since midnight, NO_TIME where invalid
+
+    Handles datetime values, datetime and HH:MM[:SS] strings, Excel
+    fractions of a day (0 <= x < 1), decimal hours (1 <= x < 24) and Excel
+    serial datetimes, whose fractional part is the time. Each distinct
+    value is converted once.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        minutes = (values.dt.hour * 60 + values.dt.minute).fillna(NO_TIME)
+        return minutes.astype(np.int32)
+
+    codes, uniques = pd.factorize(values)
+    texts = pd.Series([str(v).strip() for v in uniques], dtype=object)
+    minutes = pd.Series(np.nan, index=texts.index)
+
+    parts = texts.str.extract(TIME_OF_DAY_PATTERN).astype(float)
+    valid = (parts[0] <= 23) & (parts[1] <= 59)
+    minutes[valid] = parts[0][valid] * 60 + parts[1][valid]
+
+    numbers = pd.to_numeric(texts.where(parts[0].isna()), errors='coerce')
+    day_fraction = numbers.where((numbers >= 0) & (numbers < 1))
+    hours = numbers.where((numbers >= 1) & (numbers < 24))
+    serial_fraction = (numbers % 1).where(numbers >= 24)
+    minutes = minutes.fillna((day_fraction.fillna(serial_fraction) * 1440).round() % 1440)
+    minutes = minutes.fillna(np.floor(hours) * 60 + np.floor((hours % 1) * 60))
+
+    # Missing values have code -1 and pick the trailing NO_TIME
+    lookup = np.append(minutes.fillna(NO_TIME).to_numpy(dtype=np.int32), np.int32(NO_TIME))
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+# Keywords identifying the standard columns of comparison files
+COLUMN_MAPPINGS = {
+    'Site': [
+        'site', 'stf', 'code site', 'etablissement', 'ets', 'loc', 'location', 
+        'code site réalisateur', 'site réalisateur'
+    ],
+    'Serie': [
+        'serie', 'series', 'type', 'model', 'modèle', 'série+ss série+variante',
+        'série', 'ss série', 'variante'
+    ],
+    'Locomotive': [
+        'locomotive', 'loco', 'engine', 'number', 'numéro', 'materiel', 
+        'n° matériel roulant', 'matériel roulant', 'materiel roulant'
+    ],
+    'CodeOp': [
+        'codeop', 'code', 'operation', 'opération', 'op', 'id', 
+        'code opération', 'code operation'
+    ],
+    'Commentaire': [
+        'commentaire', 'comment', 'description', 'desc', 'note', 'remarks', 
+        'commentaires', 'libéllé intervention', 'libelle intervention', 
+        'intervention', 'libéllé', 'libelle'
+    ],
+    'Date programmation': [
+        'date programmation', 'date prog', 'schedule date', 'planned date', 'date plan',
+        'date de programmation', 'date de début', 'date debut', 'programmation'
+    ],
+    'Heure programmation': [
+        'heure programmation', 'heure prog', 'schedule time', 'planned time',
+        'heure de programmation', 'heure de début', 'heure de debut', 'heure début', 'heure de\ndébut'
+    ],
+    'Date sortie': [
+        'date sortie', 'sortie', 'exit date', 'completion date', 'finished date',
+        'date de sortie', 'date de fin', 'date fin', 'fin'
+    ],
+    'Heure sortie': [
+        'heure sortie', 'exit time', 'completion time', 'finished time',
+        'heure de sortie', 'heure de fin', 'heure fin', 'heure de\nfin'
+    ],
+    'Semaine de programmation': [
+        'semaine de programmation', 'semaine prog', 'week', 'semaine', 'week number',
+        'numéro semaine', 'numero semaine', 'semaine de prog', 'week programming',
+        'programming week', 'semaine programmation'
+    ]
+}
+
+# Keywords identifying the columns of PHP analysis files
+PHP_COLUMN_MAPPINGS = {
+    'STF': ['stf'],
+    'SERIE': ['serie'],
+    'N° Matériel Roulant': ['n° matériel roulant', 'matériel roulant'],
+    'Code Opération': ['code opération'],
+    'Libellé Intervention': ['libéllé intervention', 'libellé intervention'],
+    'Date de Début': ['date de début'],
+    'Heure de Début': ['heure de début', 'heure de\ndébut'],
+    'Date de Fin': ['date de fin'],
+    'Heure de Fin': ['heure de fin', 'heure de\nfin'],
+    'N° Semaine Ou Reliquat': ['n° semaine', 'semaine ou reliquat'],
+    'Acceptée': ['acceptée','acceptee']
+}
+
+class HeaderMatcher:
+    """Maps raw column headers to standard column names
+
+    All keywords are compiled once into a single alternation regex, ordered
+    by mapping priority, so a header is scanned once whatever the number of
+    keywords. When several standard names match, the first one in mapping
+    order wins. Results are memoized by the tuple of raw headers, so sheets
+    sharing a layout are mapped instantly.
+    """
+
+    def __init__(self, mappings, exact_first=False, strings_only=False):
+        self.names = list(mappings)
+        self.exact_first = exact_first
+        self.strings_only = strings_only
+        self.exact = {}
+        self.priority = {}
+        for index, keywords in enumerate(mappings.values()):
+            for kw in keywords:
+                self.exact.setdefault(kw.lower(), self.names[index])
+                self.priority.setdefault(kw.lower(), index)
+        ordered = sorted(self.priority, key=self.priority.get)
+        # Lookahead so overlapping keywords are all found
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in ordered) + '))')
+        self._memo = {}
+
+    @staticmethod
+    def clean(header):
+        """Lowercase a header and collapse newlines and repeated spaces"""
+        text = str(header).lower().strip().replace('\n', ' ').replace('\r', ' ')
+        return ' '.join(text.split())
+
+    def match(self, header):
+        """Get the standard name of a single header, or None"""
+        if self.strings_only and not isinstance(header, str):
+            return None
+        text = self.clean(header)
+        if self.exact_first and text in self.exact:
+            return self.exact[text]
+        found = [self.priority[m.group(1)] for m in self.pattern.finditer(text)]
+        return self.names[min(found)] if found else None
+
+    def map_headers(self, headers):
+        """Get the standard name (or None) of every header"""
+        key = tuple(headers)
+        if key not in self._memo:
+            if len(self._memo) >= 1024:
+                self._memo.clear()
+            self._memo[key] = [self.match(header) for header in key]
+        return list(self._memo[key])
+
+COLUMN_MATCHER = HeaderMatcher(COLUMN_MAPPINGS, strings_only=True)
+PHP_COLUMN_MATCHER = HeaderMatcher(PHP_COLUMN_MAPPINGS, exact_first=True)
+
+DIMENSION_PATTERN = re.compile(rb'<(?:\w+:)?dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+ROW_TAG_PATTERN = re.compile(rb'<(?:\w+:)?row[ >]')
+PROBE_BLOCK_SIZE = 64 * 1024
+
+def probe_workbook(file_path):
+    """List the sheets of an xlsx workbook with their sizes, without parsing cells
+
+    Sheet names and order come from xl/workbook.xml. Sizes come from the
+    <dimension> element that heads each worksheet part; when a writer left
+    it out, the row count is extrapolated from the rows found in the first
+    block of the sheet XML. Returns None when the file is not an xlsx
+    container, so callers can fall back to opening the workbook.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            sheets = []
+            for name, part in xlsx_sheet_parts(archive):
+                info = {'name': name, 'rows': None, 'columns': None, 'estimated': False}
+                if part in archive.NameToInfo:
+                    info.update(_probe_sheet_size(archive, part))
+                sheets.append(info)
+            return sheets
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError):
+        return None
+
+def _probe_sheet_size(archive, part):
+    """Read the size of a worksheet part from its first block of XML"""
+    with archive.open(part) as f:
+        head = f.read(PROBE_BLOCK_SIZE)
+
+    match = DIMENSION_PATTERN.search(head)
+    if match and match.group(3):
+        return {'rows': int(match.group(4)), 'columns': column_index(match.group(3).decode())}
+
+    # No usable dimension: count the rows of the first block and extrapolate
+    rows = len(ROW_TAG_PATTERN.findall(head))
+    size = archive.getinfo(part).file_size
+    if len(head) < size and head:
+        return {'rows': round(rows * size / len(head)), 'columns': None, 'estimated': True}
+    return {'rows': rows, 'columns': None, 'estimated': False}
+
+# Markup of a shared string cell up to its index, and the index; starts on the literal type attribute to scan fast
+SHARED_STRING_CELL_PATTERN = re.compile(rb'(t="s"[^>]*>\s*<(?:\w+:)?v>)(\d+)(?=<)')
+SHARED_STRING_ITEM_PATTERN = re.compile(rb'<(?:\w+:)?si(?:\s*/>|[\s>].*?</(?:\w+:)?si>)', re.DOTALL)
+# Size of the digest of each shared string
+STRING_DIGEST_SIZE = 16
+
+# Sheet fingerprints by (path, size, mtime, sheet), least recently used first;
+# each upload gets a new path, so the memo is bounded
+FINGERPRINT_MEMO_SIZE = 256
+_sheet_fingerprints = OrderedDict()
+_shared_strings = {}  # Shared string digests of the last file fingerprinted, by (path, size, mtime)
+
+def _memo_get(memo, key):
+    """Value of key in a bounded fingerprint memo, or None, marking it as recently used"""
+    value = memo.get(key)
+    if value is not None:
+        memo.move_to_end(key)
+    return value
+
+def _memo_put(memo, key, value):
+    """Store a value in a bounded fingerprint memo, dropping the least recently used entries"""
+    memo[key] = value
+    memo.move_to_end(key)
+    while len(memo) > FINGERPRINT_MEMO_SIZE:
+        memo.popitem(last=False)
+    return value
+
+def sheet_fingerprint(file_path, sheet_name):
+    """Digest of everything the parsed content of one xlsx sheet depends on
+
+    The sheet XML is hashed with its shared string indexes left out, then
+    the digests of the strings it references, in order; a tab therefore
+    keeps its fingerprint when editing another tab renumbers the shared
+    strings table. The styles part and the 1904 date system flag are
+    included too. Shared strings are digested once per file version.
+    Returns None when the file is not an xlsx container.
+    """
+    stat = os.stat(file_path)
+    version = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    fingerprint = _memo_get(_sheet_fingerprints, (version, sheet_name))
+    if fingerprint is not None:
+        return fingerprint
+
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            part = dict(xlsx_sheet_parts(archive)).get(sheet_name)
+            if part not in archive.NameToInfo:
+                return None
+            names = archive.NameToInfo
+            styles_crc = names['xl/styles.xml'].CRC if 'xl/styles.xml' in names else None
+            workbook_pr = ET.fromstring(archive.read('xl/workbook.xml')).find(f'{{{XLSX_MAIN_NS}}}workbookPr')
+            date1904 = workbook_pr is not None and workbook_pr.get('date1904')
+            digest = hashlib.sha256(f"styles:{styles_crc}:1904:{date1904}:".encode('utf-8'))
+            _hash_sheet_part(digest, archive, archive.read(part), version)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError):
+        return None
+
+    return _memo_put(_sheet_fingerprints, (version, sheet_name), digest.hexdigest())
+
+def _hash_sheet_part(digest, archive, data, version):
+    """Hash sheet XML without its shared string indexes, then the digests of the strings they reference"""
+    shared_cells = data.count(b't="s"')
+    if not shared_cells:
+        digest.update(data)
+        return
+
+    # Text between cells, cell markup and index, repeated: one regex pass
+    parts = SHARED_STRING_CELL_PATTERN.split(data)
+    indexes = parts[2::3]
+    strings = _read_shared_strings(archive, version)
+    if len(indexes) != shared_cells:
+        # Unusual cell markup: depend on the whole shared strings table
+        digest.update(strings.tobytes() + data)
+        return
+
+    del parts[2::3]
+    digest.update(b''.join(parts))
+    # Indexes past the table pick the trailing empty digest
+    positions = np.minimum(np.array(indexes, dtype=object).astype(np.int64), len(strings) - 1)
+    digest.update(strings[positions].tobytes())
+
+def _read_shared_strings(archive, version):
+    """Digest of the raw XML of each shared string item, then an empty digest, read once per file version"""
+    if version not in _shared_strings:
+        _shared_strings.clear()
+        items = []
+        if 'xl/sharedStrings.xml' in archive.NameToInfo:
+            items = SHARED_STRING_ITEM_PATTERN.findall(archive.read('xl/sharedStrings.xml'))
+        digests = [hashlib.blake2b(item, digest_size=STRING_DIGEST_SIZE).digest() for item in items]
+        _shared_strings[version] = np.array(digests + [b'\0' * STRING_DIGEST_SIZE],
+                                            dtype=f'S{STRING_DIGEST_SIZE}')
+    return _shared_strings[version]
+
+class WorkbookSession(ABC):
+    """Open workbook shared by every read made during a request
+
+    The workbook (and with it the shared-strings table) is opened once and
+    the raw cell grid of each sheet is parsed at most once. Previews, header
+    detection and sheet loads are all answered from that grid.
+
+    Subclasses are the reader backends: they open the workbook and provide
+    iter_rows, which streams the raw values of each row like openpyxl's
+    read-only worksheets, and _parse_grid, which reads a whole sheet.
+    """
+
+    # Whether iter_rows is available; when not, rows are read through _parse_grid
+    streams_rows = True
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.workbook = None
+        self.sheet_names = []
+        self._grids = {}  # Raw cell rows by sheet, as read by the Excel reader
+
+    @abstractmethod
+    def iter_rows(self, sheet_name, min_row=None, max_row=None):
+        """Stream the raw cell values of each row of a sheet as tuples"""
+
+    def _parse_grid(self, sheet_name):
+        """Read every row of a sheet into a rectangular grid"""
+        return self._read_rows(sheet_name)
+
+    def get_grid(self, sheet_name, nrows=None, max_col=None):
+        """Get the raw rows of a sheet, parsing the sheet on first access
+
+        When only the first nrows rows or the first max_col columns are
+        needed and the sheet has not been parsed yet, the rows are streamed
+        and only the cells kept are converted; the grid is not cached then.
+        """
+        if sheet_name in self._grids:
+            grid = self._grids[sheet_name]
+            grid = grid if nrows is None else grid[:nrows]
+            return grid if max_col is None else [row[:max_col] for row in grid]
+        if nrows is not None or max_col is not None:
+            return self._read_rows(sheet_name, nrows, max_col)
+
+        self._grids[sheet_name] = self._parse_grid(sheet_name)
+        return self._grids[sheet_name]
+
+    def _read_rows(self, sheet_name, nrows=None, max_col=None):
+        """Stream the first nrows rows of a sheet, converting the first max_col cells of each"""
+        grid = []
+        width = 0
+        last_row_with_data = 0
+        for row in self.iter_rows(sheet_name, max_row=nrows):
+            used = row_width(row)
+            if used:
+                # Width and trailing empty rows depend on every column, like in pandas
+                width = max(width, used)
+                last_row_with_data = len(grid) + 1
+            kept = used if max_col is None else min(used, max_col)
+            grid.append([convert_cell(value) for value in row[:kept]])
+
+        # Trim trailing empty rows and pad to a rectangle
+        del grid[last_row_with_data:]
+        width = width if max_col is None else min(width, max_col)
+        return [row + [''] * (width - len(row)) for row in grid]
+
+    def read_sheet(self, sheet_name, skiprows=None, header=0, nrows=None, usecols=None):
+        """Build a DataFrame from the cached grid, same result as pd.read_excel
+
+        With usecols, only the cells up to the last column position listed
+        are converted and parsed.
+        """
+        max_col = None if usecols is None else max(usecols) + 1
+        grid = self.get_grid(sheet_name, nrows=nrows, max_col=max_col)
+        try:
+            # Same parser settings pandas applies to Excel sheets
+            df = TextParser(grid, header=header, skiprows=skiprows, skip_blank_lines=False).read()
+        except EmptyDataError:
+            return pd.DataFrame()
+        if usecols is not None and list(usecols) != list(range(max_col)):
+            df = df.iloc[:, [i for i in usecols if i < df.shape[1]]]
+        return df
+
+    def read_header(self, sheet_name, header_row=0):
+        """Get the column names found on a single row of the sheet"""
+        if not self.streams_rows:
+            return list(self.read_sheet(sheet_name, skiprows=header_row, nrows=header_row + 1).columns)
+
+        for row in self.iter_rows(sheet_name, min_row=header_row + 1, max_row=header_row + 1):
+            return make_column_names(row[:row_width(row)])
+        return []
+
+    def stream_sheet(self, sheet_name, skiprows=0, usecols=None):
+        """Stream a sheet row by row, keeping only the columns at positions usecols
+
+        Rows come from the reader backend as plain values and are stored
+        column by column, so unused columns are never held in memory. The
+        returned frame has the same column names and dtypes as read_sheet.
+        """
+        skiprows = skiprows or 0
+        if not self.streams_rows:
+            df = self.read_sheet(sheet_name, skiprows=skiprows)
+            if usecols is not None:
+                df = df.iloc[:, [i for i in usecols if i < df.shape[1]]]
+            return df
+
+        rows = self.iter_rows(sheet_name)
+
+        # Rows above the header only count towards the sheet width, like in pandas
+        width = 0
+        for _, row in zip(range(skiprows), rows):
+            width = max(width, row_width(row))
+
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        header = list(header[:row_width(header)])
+        width = max(width, len(header))
+        kept = list(usecols) if usecols is not None else None
+        columns = {i: [] for i in (kept if kept is not None else range(width))}
+        row_count = 0
+        last_row_with_data = 0
+
+        for row in rows:
+            used = row_width(row)
+            if used:
+                last_row_with_data = row_count + 1
+            if used > width:
+                width = used
+                if kept is None:
+                    # New columns appear mid-sheet: back-fill them as empty
+                    for i in range(len(columns), width):
+                        columns[i] = [None] * row_count
+            for i, cells in columns.items():
+                value = row[i] if i < used else None
+                if isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                cells.append(value)
+            row_count += 1
+
+        positions = [i for i in columns if i < width]
+        header = header + [None] * (width - len(header))
+        names = make_column_names(header)
+        return pd.DataFrame({
+            names[i]: build_typed_column(columns[i][:last_row_with_data]) for i in positions
+        })
+
+    def close(self):
+        """Release the workbook handle and cached grids"""
+        self._grids.clear()
+        self.workbook.close()
+
+class PandasWorkbookSession(WorkbookSession):
+    """Reader backend built on pd.ExcelFile, streaming rows from openpyxl read-only sheets"""
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self.workbook = pd.ExcelFile(file_path)
+        self.sheet_names = self.workbook.sheet_names
+        self.streams_rows = self.workbook.engine == 'openpyxl'
+
+    def iter_rows(self, sheet_name, min_row=None, max_row=None):
+        sheet = self.workbook.book[sheet_name]
+        sheet.reset_dimensions()
+        return sheet.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+
+    def _parse_grid(self, sheet_name):
+        raw = self.workbook.parse(sheet_name, header=None, dtype=object, na_filter=False)
+        return raw.values.tolist()
+
+    def _read_rows(self, sheet_name, nrows=None, max_col=None):
+        if not self.streams_rows:
+            raw = self.workbook.parse(sheet_name, header=None, nrows=nrows, dtype=object, na_filter=False)
+            return raw.iloc[:, :max_col].values.tolist()
+        return super()._read_rows(sheet_name, nrows, max_col)
+
+class NativeWorkbookSession(WorkbookSession):
+    """Reader backend decoding the xlsx XML directly with XlsxReader"""
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self.workbook = XlsxReader(file_path)
+        self.sheet_names = self.workbook.sheet_names
+
+    def iter_rows(self, sheet_name, min_row=None, max_row=None):
+        return self.workbook.iter_rows(sheet_name, min_row=min_row, max_row=max_row)
+
+# Reader backends selectable with the excel_processing.reader_engine setting
+READER_ENGINES = {
+    'openpyxl': PandasWorkbookSession,
+    'native': NativeWorkbookSession
+}
+
+def open_session(file_path, engine='openpyxl'):
+    """Open a workbook session with the given reader engine
+
+    The native engine only reads xlsx containers; other files are opened
+    with the pandas engine.
+    """
+    if engine not in READER_ENGINES:
+        print(f"Unknown reader engine '{engine}', using openpyxl")
+        engine = 'openpyxl'
+    if engine == 'native' and not zipfile.is_zipfile(file_path):
+        engine = 'openpyxl'
+    return READER_ENGINES[engine](file_path)
 
 class ExcelProcessor:
     """Enhanced Excel file processor with dynamic header detection and robust processing"""
     
-    def __init__(self, file_path):
+    # Column positions kept from each file format (A-K, or A-P for PHP files)
+    COMPARISON_COLUMNS = list(range(11))
+    PHP_COLUMNS = list(range(16))
+
+    def __init__(self, file_path, streaming=None, cache=None, engine=None, compact=None, layouts=None):
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
         self.sheet_names = []
         self.detected_headers = {}  # Store detected header rows by sheet
+        self.column_mappings = {}  # Standard names of the raw headers by sheet
+        self.date_formats = {}  # Date formats used by sheet and column
+        self.session = None
+        # Streaming mode reads rows through openpyxl instead of materializing the sheet
+        if streaming is None:
+            streaming = get_setting("excel_processing.streaming_reader", False)
+        self.streaming = streaming
+        # Reader backend used to decode the workbook, see READER_ENGINES
+        if engine is None:
+            engine = get_setting("excel_processing.reader_engine", "openpyxl")
+        self.engine = engine
+        # Loaded sheets are shrunk with compact_frame before being returned
+        if compact is None:
+            compact = get_setting("excel_processing.compact_dtypes", False)
+        self.compact = compact
+        # Parsed sheets are reused across requests through the on-disk cache (False disables it)
+        self.cache = get_sheet_cache() if cache is None else (cache or None)
+        # Header rows and column mappings of known templates are reused through the registry
+        self.layouts = get_layout_registry() if layouts is None else (layouts or None)
         
     def load_workbook(self):
         """Load Excel file and get sheet names"""
         try:
-            self.workbook = pd.ExcelFile(self.file_path)
-            self.sheet_names = self.workbook.sheet_names
+            if self.session is None:
+                self.session = open_session(self.file_path, self.engine)
+            self.workbook = self.session.workbook
+            self.sheet_names = self.session.sheet_names
             return True
         except Exception as e:
             print(f"Error loading {self.file_path}: {str(e)}")
             return False
+
+    def _get_session(self):
+        """Get the open workbook session, opening it on first use"""
+        if self.session is None and not self.load_workbook():
+            raise ValueError(f"Unable to open {self.file_path}")
+        return self.session
+
+    def close(self):
+        """Close the workbook session"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    @staticmethod
+    def probe_workbook(file_path):
+        """List sheet names and sizes without parsing cells, see probe_workbook"""
+        return probe_workbook(file_path)
+
+    @staticmethod
+    def load_sheets(tasks, max_workers=None):
+        """Load (file_path, sheet_name, is_base_file) tasks in parallel, see load_sheets"""
+        return load_sheets(tasks, max_workers)
     
     def get_sheet_preview(self, sheet_name, rows=15):
         """Get raw sheet data without processing"""
         try:
-            return pd.read_excel(self.file_path, sheet_name=sheet_name, header=None, nrows=rows)
+            return self._get_session().read_sheet(sheet_name, header=None, nrows=rows)
         except Exception as e:
             print(f"Error previewing sheet: {str(e)}")
             return pd.DataFrame()
@@ -92,71 +917,7 @@ class ExcelProcessor:
     
     def detect_column_types(self, columns):
         """Enhanced column detection for harmonizing different file formats"""
-        result = [None] * len(columns)
-        
-        column_mappings = {
-            'Site': [
-                'site', 'stf', 'code site', 'etablissement', 'ets', 'loc', 'location', 
-                'code site réalisateur', 'site réalisateur'
-            ],
-            'Serie': [
-                'serie', 'series', 'type', 'model', 'modèle', 'série+ss série+variante',
-                'série', 'ss série', 'variante'
-            ],
-            'Locomotive': [
-                'locomotive', 'loco', 'engine', 'number', 'numéro', 'materiel', 
-                'n° matériel roulant', 'matériel roulant', 'materiel roulant'
-            ],
-            'CodeOp': [
-                'codeop', 'code', 'operation', 'opération', 'op', 'id', 
-                'code opération', 'code operation'
-            ],
-            'Commentaire': [
-                'commentaire', 'comment', 'description', 'desc', 'note', 'remarks', 
-                'commentaires', 'libéllé intervention', 'libelle intervention', 
-                'intervention', 'libéllé', 'libelle'
-            ],
-            'Date programmation': [
-                'date programmation', 'date prog', 'schedule date', 'planned date', 'date plan',
-                'date de programmation', 'date de début', 'date debut', 'programmation'
-            ],
-            'Heure programmation': [
-                'heure programmation', 'heure prog', 'schedule time', 'planned time',
-                'heure de programmation', 'heure de début', 'heure de debut', 'heure début', 'heure de\ndébut'
-            ],
-            'Date sortie': [
-                'date sortie', 'sortie', 'exit date', 'completion date', 'finished date',
-                'date de sortie', 'date de fin', 'date fin', 'fin'
-            ],
-            'Heure sortie': [
-                'heure sortie', 'exit time', 'completion time', 'finished time',
-                'heure de sortie', 'heure de fin', 'heure fin', 'heure de\nfin'
-            ],
-            'Semaine de programmation': [
-                'semaine de programmation', 'semaine prog', 'week', 'semaine', 'week number',
-                'numéro semaine', 'numero semaine', 'semaine de prog', 'week programming',
-                'programming week', 'semaine programmation'
-            ]
-        }
-        # Check each column
-        for i, col in enumerate(columns):
-            if not isinstance(col, str):
-                continue
-                
-            # Clean the column name: remove newlines, extra spaces, and convert to lowercase
-            col_clean = str(col).lower().strip().replace('\n', ' ').replace('\r', ' ')
-            # Remove multiple spaces
-            col_clean = ' '.join(col_clean.split())
-            
-            # Check against each mapping
-            for standard_name, keywords in column_mappings.items():
-                if any(kw.lower() in col_clean for kw in keywords):
-                    result[i] = standard_name
-                    #print(f"Mapped '{col}' -> '{standard_name}'")
-                    break
-        
-        #print(f"Column mapping results: {dict(zip(columns, result))}")
-        return result
+        return COLUMN_MATCHER.map_headers(columns)
 
     def get_sheet_data(self, sheet_name, is_base_file=False, header_row=None, 
                   use_dynamic_detection=True, file_type=None):
@@ -169,37 +930,91 @@ class ExcelProcessor:
             use_dynamic_detection: Whether to attempt to detect headers
             file_type: Type of file ('base', 'comparison', or 'analysis')
         """
-        try:
-            skiprows = None            
-            if header_row is not None:
-                skiprows = header_row
-            elif not use_dynamic_detection:
-                if is_base_file or file_type == 'base':
-                    skiprows = 2  # PREPA PHP files (row 3)
-                else:
-                    skiprows = 7  # Comparison files (row 8)
+        skiprows = None
+        if header_row is not None:
+            skiprows = header_row
+        elif not use_dynamic_detection:
+            if is_base_file or file_type == 'base':
+                skiprows = 2  # PREPA PHP files (row 3)
             else:
+                skiprows = 7  # Comparison files (row 8)
+
+        # Serve the standardized frame from the sheet cache when the file was already parsed
+        cache_key = None
+        if self.cache is not None:
+            try:
+                header_key = skiprows if skiprows is not None else 'auto'
+                # Keyed on the sheet's own content, so editing another tab keeps this entry valid
+                content_hash = sheet_fingerprint(self.file_path, sheet_name)
+                cache_key = self.cache.make_key(self.file_path, sheet_name, header_key, file_type, content_hash)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self._restore_sheet_meta(sheet_name, self.cache.get_meta(cache_key))
+                    return compact_frame(cached) if self.compact else cached
+            except OSError as e:
+                print(f"Sheet cache unavailable: {str(e)}")
+
+        df = self._load_sheet_data(sheet_name, skiprows, file_type)
+        if cache_key is not None and not df.empty:
+            self.cache.put(cache_key, df, self._sheet_meta(sheet_name))
+        # Cache entries keep the plain frame, compaction is applied on the way out
+        return compact_frame(df) if self.compact else df
+
+    def _sheet_meta(self, sheet_name):
+        """Header row, column mapping and date formats recorded while loading a sheet"""
+        return {
+            'header_row': self.detected_headers.get(sheet_name),
+            'column_mapping': self.column_mappings.get(sheet_name),
+            'date_formats': self.date_formats.get(sheet_name)
+        }
+
+    def _restore_sheet_meta(self, sheet_name, meta):
+        """Record the metadata of a sheet served from the cache, as loading it would have"""
+        if meta.get('header_row') is not None:
+            self.detected_headers[sheet_name] = meta['header_row']
+        if meta.get('column_mapping') is not None:
+            headers, columns = meta['column_mapping']
+            self.column_mappings[sheet_name] = (headers, columns)
+        if meta.get('date_formats') is not None:
+            self.date_formats[sheet_name] = meta['date_formats']
+
+    def _load_sheet_data(self, sheet_name, skiprows, file_type):
+        """Parse and standardize a sheet, detecting the header row if skiprows is None"""
+        try:
+            session = self._get_session()
+            layout = None
+            detected = False
+            if skiprows is None:
                 # Try to get from cache first
                 if sheet_name in self.detected_headers:
                     skiprows = self.detected_headers[sheet_name]
                 else:
-                    # Dynamically detect the header row
-                    skiprows = self.detect_header_row(sheet_name)
+                    # Known templates skip detection
+                    if self.layouts is not None:
+                        _, layout = self.layouts.lookup(session, sheet_name)
+                    if layout is not None:
+                        skiprows = layout['header_row']
+                    else:
+                        # Dynamically detect the header row
+                        skiprows = self.detect_header_row(sheet_name)
+                        detected = True
                     # Cache the result
                     self.detected_headers[sheet_name] = skiprows
         
             # Read the sheet with the determined header row
-            df = pd.read_excel(self.file_path, sheet_name=sheet_name, skiprows=skiprows)
-            
-            # Check if this is a PHP analysis file
-            is_analysis_file = file_type == 'analysis' or (
-                file_type is None and 
-                any(col in str(c).upper() for c in df.columns 
-                    for col in ['STF', 'N° MATERIEL', 'N° SEMAINE', 'EQUIPE'])
-            )
+            # Only read the columns this file format can use
+            is_analysis_file = self._is_analysis_file(session.read_header(sheet_name, skiprows or 0), file_type)
+            usecols = self.PHP_COLUMNS if is_analysis_file else self.COMPARISON_COLUMNS
+            if self.streaming:
+                df = session.stream_sheet(sheet_name, skiprows=skiprows, usecols=usecols)
+            else:
+                df = session.read_sheet(sheet_name, skiprows=skiprows, usecols=usecols)
             
             if is_analysis_file:
-                return self._process_php_analysis_file(df)
+                result = self._process_php_analysis_file(df, sheet_name, layout)
+                if detected:
+                    self._register_layout(sheet_name, skiprows, 'analysis')
+                return result
             else:
                 # Continue with standard comparison file processing
                 # Ensure we have at least some columns
@@ -210,7 +1025,12 @@ class ExcelProcessor:
                 col_limit = min(11, df.shape[1])
                 df = df.iloc[:, :col_limit].copy()
                 
-                detected_mappings = self.detect_column_types(df.columns)
+                detected_mappings = LayoutRegistry.mapping_for(layout, 'comparison', df.columns)
+                if detected_mappings is None:
+                    detected_mappings = self.detect_column_types(df.columns)
+                self.column_mappings[sheet_name] = (list(df.columns), detected_mappings)
+                if detected:
+                    self._register_layout(sheet_name, skiprows, 'comparison')
 
             standard_columns = ["Site", "Serie", "Locomotive", "CodeOp", "Commentaire", 
                                "Date programmation", "Heure programmation", 
@@ -271,61 +1091,52 @@ class ExcelProcessor:
             df.columns = [column_mapping.get(col, col) for col in df.columns]
             df = df.loc[:, ~df.columns.duplicated()]
             
+            df = clean_columns(df)
+
             for col in df.columns:
-                df[col] = df[col].fillna('')
-                if not pd.api.types.is_datetime64_any_dtype(df[col]):
-                    try:
-                        df[col] = df[col].astype(str).str.strip()
-                    except:
-                        df[col] = df[col].fillna('').astype(str)
-                
-                # Replace various null indicators
-                df[col] = df[col].replace(['nan', 'NaT', 'None', 'NA', 'N/A'], '')
-                
                 # Try to convert date columns to datetime
                 if any(date_word in col.lower() for date_word in ['date', 'butee', 'programmation', 'sortie']):
                     try:
-                        # First check if column contains date-like strings
-                        date_pattern = r'\d{1,4}[/-]\d{1,2}[/-]\d{1,4}'
-                        has_dates = df[col].astype(str).str.contains(date_pattern, regex=True, na=False).any()
-                        
-                        if has_dates:
-                            # Check format type (YYYY-MM-DD vs DD/MM/YYYY)
-                            iso_pattern = r'\d{4}-\d{2}-\d{2}'
-                            has_iso = df[col].astype(str).str.contains(iso_pattern, regex=True, na=False).any()
-                            
-                            if has_iso:
-                                # ISO format - don't use dayfirst
-                                df[col] = pd.to_datetime(df[col], errors='coerce')
-                            else:
-                                # Likely DD/MM/YYYY format
-                                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+                        converted, formats = parse_date_column(df[col], require_dates=True)
+                        if converted is not None:
+                            df[col] = converted
+                            self.date_formats.setdefault(sheet_name, {})[col] = formats
                     except Exception as e:
                         print(f"Date conversion error for {col}: {e}")
             
             # Filter out rows that are completely empty or only contain NA values
             # Check if a row has any non-empty content in any column except Site
             value_cols = [col for col in df.columns if col != "Site"]
-            
-            def has_content(row):
-                # Check if any column has meaningful content
-                for col in value_cols:
-                    value = str(row[col]).strip()
-                    if value and value not in ('', 'nan', 'NaT', 'None', 'NA', 'N/A'):
-                        return True
-                return False
-            
-            # Filter to keep only rows that have content
-            df_with_content = df[df.apply(has_content, axis=1)]
-            
-            return df_with_content
+            return df[meaningful_rows(df, value_cols)]
                 
         except Exception as e:
             print(f"Error loading sheet data: {str(e)}")
             return pd.DataFrame()
 
-    def _process_php_analysis_file(self, df):
-        """Process PHP analysis file format with different column structure"""
+    def _register_layout(self, sheet_name, header_row, kind):
+        """Remember the header row and column mapping detected for the layout of a sheet"""
+        if self.layouts is None or sheet_name not in self.column_mappings:
+            return
+        headers, columns = self.column_mappings[sheet_name]
+        try:
+            self.layouts.register(self._get_session(), sheet_name, header_row, kind, headers, columns)
+        except Exception as e:
+            print(f"Error registering layout of {sheet_name}: {str(e)}")
+
+    def _is_analysis_file(self, columns, file_type=None):
+        """Check if the sheet columns belong to a PHP analysis file"""
+        return file_type == 'analysis' or (
+            file_type is None and 
+            any(col in str(c).upper() for c in columns 
+                for col in ['STF', 'N° MATERIEL', 'N° SEMAINE', 'EQUIPE'])
+        )
+
+    def _process_php_analysis_file(self, df, sheet_name=None, layout=None):
+        """Process PHP analysis file format with different column structure
+
+        layout is the registered layout of the sheet, whose column mapping
+        is reused when it was made for the same headers.
+        """
         if df.empty:
             return df
 
@@ -337,38 +1148,13 @@ class ExcelProcessor:
             df_copy = df.copy()
 
         # PHP analysis column mappings
-        php_columns = {
-            'STF': ['stf'],
-            'SERIE': ['serie'],
-            'N° Matériel Roulant': ['n° matériel roulant', 'matériel roulant'],
-            'Code Opération': ['code opération'],
-            'Libellé Intervention': ['libéllé intervention', 'libellé intervention'],
-            'Date de Début': ['date de début'],
-            'Heure de Début': ['heure de début', 'heure de\ndébut'],
-            'Date de Fin': ['date de fin'],
-            'Heure de Fin': ['heure de fin', 'heure de\nfin'],
-            'N° Semaine Ou Reliquat': ['n° semaine', 'semaine ou reliquat'],
-            'Acceptée': ['acceptée','acceptee']
-        }
-        
         # Standardize column names using exact matching first, then fuzzy matching
-        column_map = {}
-        for i, col in enumerate(df_copy.columns):
-            col_str = str(col).lower().strip().replace('\n', ' ').replace('\r', ' ')
-            col_str = ' '.join(col_str.split())  # Remove multiple spaces
-            
-            # Try exact match first
-            for std_col, keywords in php_columns.items():
-                if col_str in [kw.lower() for kw in keywords]:
-                    column_map[col] = std_col
-                    break
-            
-            # If no exact match, try fuzzy matching
-            if col not in column_map:
-                for std_col, keywords in php_columns.items():
-                    if any(kw.lower() in col_str for kw in keywords):
-                        column_map[col] = std_col
-                        break
+        mapped = LayoutRegistry.mapping_for(layout, 'analysis', df_copy.columns)
+        if mapped is None:
+            mapped = PHP_COLUMN_MATCHER.map_headers(df_copy.columns)
+        if sheet_name is not None:
+            self.column_mappings[sheet_name] = (list(df_copy.columns), mapped)
+        column_map = {col: std_col for col, std_col in zip(df_copy.columns, mapped) if std_col}
         
         # Rename matched columns
         if column_map:
@@ -391,47 +1177,14 @@ class ExcelProcessor:
             df_copy.columns = new_cols
 
         # Clean and standardize data
-        for col in df_copy.columns:
-            df_copy[col] = df_copy[col].fillna('')
-            
-            # Convert to string and clean, but preserve datetime columns
-            if not pd.api.types.is_datetime64_any_dtype(df_copy[col]):
-                try:
-                    df_copy[col] = df_copy[col].astype(str).str.strip()
-                except:
-                    df_copy[col] = df_copy[col].fillna('').astype(str)
-            
-            # Replace null indicators
-            df_copy[col] = df_copy[col].replace(['nan', 'NaT', 'None', 'NA', 'N/A'], '')
+        df_copy = clean_columns(df_copy)
         
-        # Handle time columns that might contain full datetime values
+        # Keep only the time of datetime strings like "1900-01-25 12:00:00"
         time_columns = ['Heure de Début', 'Heure de Fin']
         for time_col in time_columns:
-            if time_col in df_copy.columns:
-                sample_values = df_copy[time_col].dropna().head(3)
-                
-                for i, val in enumerate(sample_values):
-                    # Check if this looks like a datetime string with 1900 date
-                    if isinstance(val, str) and ('1900-' in val or 'T' in val):
-                        # Extract time from datetime strings like "1900-01-25 12:00:00"
-                        def extract_time_from_datetime_string(dt_str):
-                            try:
-                                if isinstance(dt_str, str) and dt_str.strip():
-                                    # Parse as datetime and extract time
-                                    parsed = pd.to_datetime(dt_str, errors='coerce')
-                                    if pd.notna(parsed):
-                                        return parsed.strftime('%H:%M:%S')
-                                    else:
-                                        if ' ' in dt_str:
-                                            time_part = dt_str.split(' ')[-1]
-                                            if ':' in time_part:
-                                                return time_part
-                                return dt_str
-                            except:
-                                return dt_str
-                        
-                        df_copy[time_col] = df_copy[time_col].apply(extract_time_from_datetime_string)
-                        break
+            if time_col in df_copy.columns and not pd.api.types.is_datetime64_any_dtype(df_copy[time_col]):
+                times = df_copy[time_col].astype(str).str.extract(DATETIME_TEXT_PATTERN, expand=False)
+                df_copy[time_col] = times.fillna(df_copy[time_col])
 
         date_columns = ['Date de Début', 'Date de Fin']
         for date_col in date_columns:
@@ -439,32 +1192,71 @@ class ExcelProcessor:
                 # Save original values in a separate column
                 df_copy[f"{date_col}_Original"] = df_copy[date_col].copy()
                 
-                # Check if date column contains datetime values or strings
-                sample_values = df_copy[date_col].dropna().head(3)
-                is_iso_format = False
-                
-                # Try to detect ISO format
-                for val in sample_values:
-                    if isinstance(val, str) and re.match(r'^\d{4}-\d{2}-\d{2}', val):
-                        is_iso_format = True
-                        break
-                
-                # Use the appropriate dayfirst setting based on detected format
                 try:
-                    if is_iso_format:
-                        df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce', dayfirst=False)
-                    else:
-                        df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce', dayfirst=True)
+                    df_copy[date_col], formats = parse_date_column(df_copy[date_col])
+                    if sheet_name is not None:
+                        self.date_formats.setdefault(sheet_name, {})[date_col] = formats
                 except Exception as e:
                     print(f"Date conversion error for {date_col}: {e}")
         
         # Filter out empty rows
         if not df_copy.empty:
-            has_content = df_copy.apply(
-                lambda row: any(str(val).strip() not in ('', 'nan', 'NaT', 'None', 'NA', 'N/A') 
-                            for val in row), 
-                axis=1
-            )
-            df_copy = df_copy[has_content]
+            df_copy = df_copy[meaningful_rows(df_copy)]
+
+        # Times as minutes since midnight, so dates and times combine with array arithmetic
+        for time_col in time_columns:
+            if time_col in df_copy.columns:
+                df_copy[f"{time_col}_Minutes"] = time_to_minutes(df_copy[time_col])
         
-        return df_copy
\ No newline at end of file
+        return df_copy
+
+# Processors opened by a sheet loader worker process, by file path
+_worker_processors = {}
+
+def _load_sheet(processors, file_path, sheet_name, is_base_file):
+    """Load a standardized sheet, reusing the processor opened for its file
+
+    The workbook is only opened when the sheet is not served from the sheet cache.
+    """
+    processor = processors.get(file_path)
+    if processor is None:
+        processor = ExcelProcessor(file_path)
+        processors[file_path] = processor
+    return processor.get_sheet_data(sheet_name, is_base_file=is_base_file, use_dynamic_detection=True)
+
+def _load_sheet_task(file_path, sheet_name, is_base_file):
+    """Load a sheet inside a worker process"""
+    return _load_sheet(_worker_processors, file_path, sheet_name, is_base_file)
+
+def load_sheets(tasks, max_workers=None):
+    """Load sheets in parallel, yielding (task, DataFrame) pairs as they complete
+
+    Each task is a (file_path, sheet_name, is_base_file) tuple. max_workers
+    defaults to the excel_processing.max_workers setting, where 0 means one
+    worker per CPU; with a single worker the sheets are loaded in this process.
+    """
+    tasks = list(dict.fromkeys(tasks))
+    if max_workers is None:
+        max_workers = get_setting("excel_processing.max_workers", 0)
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+
+    if max_workers <= 1:
+        processors = {}
+        try:
+            for task in tasks:
+                yield task, _load_sheet(processors, *task)
+        finally:
+            for processor in processors.values():
+                processor.close()
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_load_sheet_task, *task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"Error loading sheet {task[1]} of {task[0]}: {str(e)}")
+                df = pd.DataFrame()
+            yield task, df
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+# Bump when the header detection or column mapping rules change so old layouts are ignored
+REGISTRY_VERSION = 1
+# Seconds after which a lock file left by a crashed process is ignored
+LOCK_STALE_SECONDS = 10
+
+class LayoutRegistry:
+    """Persistent registry of the sheet layouts of known export templates
+
+    A layout is fingerprinted from its header row position, the number of
+    filled cells in each row above it and the header cells themselves. The
+    header row and the column mapping resolved for a layout are stored in
+    a JSON file and reused whenever a sheet with the same fingerprint is
+    loaded again, so header detection only runs on new layouts.
+
+    Several processes may register layouts at once (see load_sheets): each
+    write re-reads the file under a lock file and merges its layout in, so
+    layouts learned by other processes are kept.
+    """
+
+    def __init__(self, path=None, max_entries=256):
+        if path is None:
+            app_data_path = os.environ.get('APPDATA', os.path.expanduser('~'))
+            path = os.path.join(app_data_path, 'ECT_Technis', 'layouts.json')
+        self.path = path
+        self.max_entries = max_entries
+        self.layouts = self._read()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    @staticmethod
+    def fingerprint(grid, header_row):
+        """Fingerprint the layout of a sheet whose first rows are grid, or None if too short"""
+        if header_row >= len(grid):
+            return None
+        leading = [sum(1 for value in row if value != '') for row in grid[:header_row]]
+        header = [str(value).strip() for value in grid[header_row]]
+        while header and header[-1] == '':
+            header.pop()
+        if not header:
+            return None
+        parts = [REGISTRY_VERSION, header_row, leading, header]
+        return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+    def lookup(self, session, sheet_name):
+        """Find the registered layout of a sheet
+
+        Returns (fingerprint, layout) or (None, None) when no registered
+        layout matches. Only the rows down to the lowest known header row
+        are read.
+        """
+        header_rows = sorted({layout['header_row'] for layout in self.layouts.values()})
+        if not header_rows:
+            return None, None
+        grid = session.get_grid(sheet_name, nrows=header_rows[-1] + 1)
+        for header_row in header_rows:
+            key = self.fingerprint(grid, header_row)
+            if key in self.layouts:
+                return key, self.layouts[key]
+        return None, None
+
+    def register(self, session, sheet_name, header_row, kind, headers, columns):
+        """Store the header row and column mapping resolved for the layout of a sheet"""
+        grid = session.get_grid(sheet_name, nrows=header_row + 1)
+        key = self.fingerprint(grid, header_row)
+        if key is None:
+            return
+        layout = {
+            'header_row': header_row,
+            'kind': kind,
+            'headers': [str(header) for header in headers],
+            'columns': list(columns)
+        }
+        if self.layouts.get(key) == layout:
+            return
+        with self._lock():
+            # Merge into the layouts on disk, other processes may have added some
+            layouts = self._read()
+            layouts.pop(key, None)
+            layouts[key] = layout
+            # Oldest layouts go first, entries are kept in insertion order
+            while len(layouts) > self.max_entries:
+                layouts.pop(next(iter(layouts)))
+            self.layouts = layouts
+            self._write()
+
+    @staticmethod
+    def mapping_for(layout, kind, headers):
+        """Get the stored column mapping of a layout if it applies to these headers, else None"""
+        if layout is None or layout.get('kind') != kind:
+            return None
+        if layout.get('headers') != [str(header) for header in headers]:
+            return None
+        return list(layout['columns'])
+
+    def _read(self):
+        """Load the registered layouts, starting empty if the file is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != REGISTRY_VERSION:
+                return {}
+            return data.get('layouts', {})
+        except Exception as e:
+            print(f"Error reading layout registry {self.path}: {str(e)}")
+            return {}
+
+    @contextmanager
+    def _lock(self, timeout=5.0):
+        """Hold the registry lock file, proceeding without it after timeout seconds"""
+        lock_path = self.path + '.lock'
+        deadline = time.monotonic() + timeout
+        fd = None
+        while fd is None:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue  # Released meanwhile
+                if time.monotonic() > deadline:
+                    print(f"Layout registry lock {lock_path} busy, writing without it")
+                    break
+                time.sleep(0.01)
+            except OSError as e:
+                print(f"Error locking layout registry {lock_path}: {str(e)}")
+                break
+        try:
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+
+    def _write(self):
+        """Save the registered layouts atomically"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.json')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': REGISTRY_VERSION, 'layouts': self.layouts}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error writing layout registry {self.path}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+class PairScorer:
+    """Similarity scores of value pairs, computed once per distinct pair
+
+    Values are factorized into distinct strings and only the distinct
+    (base value, comparison value) pairs are scored; scores are scattered
+    back to the pairs of rows by their codes. Scores, and results computed
+    per value such as phonetic codes, are kept in a bounded LRU memo shared
+    by the similarity methods, so values met again later in a run are not
+    scored again.
+    """
+
+    def __init__(self, max_entries=500_000):
+        self.max_entries = max_entries
+        self.memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def factorize(values):
+        """Code of each value and the distinct values, as strings"""
+        codes, uniques = pd.factorize(pd.Series([str(value) for value in values], dtype=object))
+        return codes, list(uniques)
+
+    def pair_scores(self, name, scorer, base_values, comp_values, base_rows, comp_rows):
+        """Score of each pair of rows (base_rows[i], comp_rows[i])
+
+        scorer takes two lists of strings and returns the score of each
+        pair in order; name identifies its scores in the memo.
+        """
+        base_codes, base_uniques = self.factorize(base_values)
+        comp_codes, comp_uniques = self.factorize(comp_values)
+        width = max(len(comp_uniques), 1)
+        pair_codes, pairs = pd.factorize(base_codes[base_rows].astype(np.int64) * width + comp_codes[comp_rows])
+        left = [base_uniques[i] for i in (pairs // width).tolist()]
+        right = [comp_uniques[i] for i in (pairs % width).tolist()]
+        return self._memoized(scorer, [(name, l, r) for l, r in zip(left, right)], left, right)[pair_codes]
+
+    @staticmethod
+    def matrix_scores(scorer, base_values, comp_values):
+        """Scores of all pairs of distinct values, with the code of each row on both sides
+
+        scorer takes two lists of strings and returns their score matrix.
+        Matrices are not memoized, they would flush the memo.
+        """
+        base_codes, base_uniques = PairScorer.factorize(base_values)
+        comp_codes, comp_uniques = PairScorer.factorize(comp_values)
+        return np.asarray(scorer(base_uniques, comp_uniques), dtype=np.float64), base_codes, comp_codes
+
+    def value_results(self, name, func, values):
+        """Result of func for each value, computed once per distinct value"""
+        codes, uniques = self.factorize(values)
+        results = self._memoized(lambda uniques, _: [func(value) for value in uniques],
+                                 [(name, value) for value in uniques], uniques, uniques, dtype=object)
+        return results[codes] if len(results) else np.empty(len(codes), dtype=object)
+
+    def stats(self):
+        """Memo lookups so far: hits, misses, hit rate and entries"""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.memo),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def _memoized(self, scorer, keys, left, right, dtype=np.float64):
+        """Results of keys from the memo, computing the missing ones with scorer(left, right) in one call"""
+        results = np.empty(len(keys), dtype=dtype)
+        missing = []
+        for i, key in enumerate(keys):
+            if key in self.memo:
+                results[i] = self.memo[key]
+                self.memo.move_to_end(key)
+            else:
+                missing.append(i)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            computed = scorer([left[i] for i in missing], [right[i] for i in missing])
+            for i, result in zip(missing, computed):
+                results[i] = result
+                self.memo[keys[i]] = result
+            # Least recently used entries go first
+            while len(self.memo) > self.max_entries:
+                self.memo.popitem(last=False)
+        return results
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+# Prime modulus of the MinHash permutations
+MINHASH_PRIME = (1 << 31) - 1
+
+class SemanticIndex:
+    """Pairs of word sets whose Jaccard similarity may exceed a threshold
+
+    Word sets are indexed by token. With recall 1.0, pairs are found by
+    joining the token -> sets postings of both sides, restricted to the
+    prefix of each set: with tokens ordered from rarest to most frequent,
+    two sets above the threshold always share a token among their first
+    |set| - ceil(threshold * |set|) + 1 ones. With a lower recall, each set
+    gets a MinHash signature cut into LSH bands: only sets sharing a band
+    are paired, and the rows per band are chosen as high as recall allows
+    at the threshold. Lower recall is faster on sets of many words but may
+    miss pairs near the threshold. In both cases the Jaccard similarity of
+    the pairs found is computed exactly and only pairs above it are kept.
+    """
+
+    def __init__(self, threshold, recall=0.95, num_perm=128, seed=0):
+        self.threshold = threshold
+        self.recall = recall
+        self.num_perm = num_perm
+        self.seed = seed
+        self.stats = None
+
+    def similar_pairs(self, base_sets, comp_sets, base_rows=None, comp_rows=None):
+        """Get (base rows, comparison rows) whose word sets have a Jaccard similarity above the threshold
+
+        Rows are positions in the lists of word sets; empty sets never pair.
+        When base_rows and comp_rows are given, only these pairs of rows are
+        checked and the index is not used.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        base_codes, base_distinct = self._distinct(base_sets)
+        comp_codes, comp_distinct = self._distinct(comp_sets)
+        self.stats = {'base_sets': len(base_distinct), 'comp_sets': len(comp_distinct), 'candidates': 0, 'pairs': 0}
+        if not base_distinct or not comp_distinct:
+            return empty, empty
+
+        # Token ids shared by both sides, rarest first
+        tokens = pd.Series([token for words in base_distinct + comp_distinct for token in words], dtype=object)
+        counts = tokens.map(tokens.value_counts())
+        ranks = pd.DataFrame({'count': counts, 'token': tokens}).drop_duplicates('token').sort_values(['count', 'token'])
+        token_ids = tokens.map(pd.Series(np.arange(len(ranks)), index=ranks['token'])).to_numpy(dtype=np.int64)
+        sizes = np.array([len(words) for words in base_distinct + comp_distinct])
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        set_ids = np.repeat(np.arange(len(sizes)), sizes)
+        # Tokens of each set in rank order
+        order = np.lexsort((token_ids, set_ids))
+        token_ids = token_ids[order]
+        n_base = len(base_distinct)
+
+        if base_rows is not None:
+            # Distinct pairs of sets of the given rows
+            base_keys, comp_keys = base_codes[base_rows], comp_codes[comp_rows]
+            valid = (base_keys >= 0) & (comp_keys >= 0)
+            pair_codes, set_pair_codes = pd.factorize(base_keys[valid] * len(comp_distinct) + comp_keys[valid])
+            base_keys, comp_keys = set_pair_codes // len(comp_distinct), set_pair_codes % len(comp_distinct)
+        elif self.recall >= 1:
+            base_keys, comp_keys = self._prefix_pairs(token_ids, set_ids, sizes, starts, n_base)
+        else:
+            base_keys, comp_keys = self._lsh_pairs(token_ids, sizes, starts, n_base)
+        self.stats['candidates'] = len(base_keys)
+
+        # Exact Jaccard similarity of the candidate sets, with some slack for the rounding of callers
+        similarity = self._jaccard(base_keys, comp_keys, token_ids, set_ids, sizes, starts, n_base, len(ranks))
+        keep = similarity > self.threshold - 1e-9
+        set_pairs = pd.DataFrame({'base_set': base_keys[keep], 'comp_set': comp_keys[keep]})
+        self.stats['pairs'] = len(set_pairs)
+        if base_rows is not None:
+            rows_kept = np.zeros(len(base_rows), dtype=bool)
+            rows_kept[valid] = keep[pair_codes]
+            return base_rows[rows_kept], comp_rows[rows_kept]
+
+        # Expand pairs of distinct sets to the rows holding them
+        base_rows = pd.DataFrame({'base_set': base_codes, 'base': np.arange(len(base_codes))})
+        comp_rows = pd.DataFrame({'comp_set': comp_codes, 'comp': np.arange(len(comp_codes))})
+        pairs = set_pairs.merge(base_rows, on='base_set').merge(comp_rows, on='comp_set')
+        return pairs['base'].to_numpy(dtype=np.int64), pairs['comp'].to_numpy(dtype=np.int64)
+
+    @staticmethod
+    def _distinct(word_sets):
+        """Code of each word set (-1 when empty) and the distinct non-empty sets"""
+        keys = [' '.join(sorted(words)) if words else None for words in word_sets]
+        codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+        return codes, [set(key.split(' ')) for key in uniques]
+
+    def _prefix_pairs(self, token_ids, set_ids, sizes, starts, n_base):
+        """Pairs of sets sharing a prefix token, with sizes compatible with the threshold"""
+        threshold = max(self.threshold - 1e-9, 0)
+        prefix = sizes - np.ceil(threshold * sizes).astype(np.int64) + 1
+        in_prefix = np.arange(len(token_ids)) - starts[set_ids] < prefix[set_ids]
+        postings = pd.DataFrame({'set': set_ids[in_prefix], 'token': token_ids[in_prefix]})
+        base_postings = postings[postings['set'] < n_base].rename(columns={'set': 'base'})
+        comp_postings = postings[postings['set'] >= n_base].rename(columns={'set': 'comp'})
+        pairs = base_postings.merge(comp_postings, on='token')[['base', 'comp']].drop_duplicates()
+        base_keys = pairs['base'].to_numpy(dtype=np.int64)
+        comp_keys = pairs['comp'].to_numpy(dtype=np.int64)
+        # Length filter: a set can only pass the threshold with sets of close size
+        size_b, size_c = sizes[base_keys], sizes[comp_keys]
+        keep = (size_c >= threshold * size_b) & (size_b >= threshold * size_c)
+        return base_keys[keep], comp_keys[keep] - n_base
+
+    @staticmethod
+    def _jaccard(base_keys, comp_keys, token_ids, set_ids, sizes, starts, n_base, n_tokens, chunk=1_000_000):
+        """Jaccard similarity of pairs of sets, by looking up the tokens of base sets in comparison sets"""
+        comp_codes = np.sort((set_ids[set_ids >= n_base] - n_base) * n_tokens + token_ids[set_ids >= n_base])
+        shared = np.zeros(len(base_keys), dtype=np.int64)
+        for first in range(0, len(base_keys), chunk):
+            pairs = np.arange(first, min(first + chunk, len(base_keys)))
+            counts = sizes[base_keys[pairs]]
+            pair_of_token = np.repeat(pairs, counts)
+            offsets = np.arange(len(pair_of_token)) - np.repeat(np.cumsum(counts) - counts, counts)
+            queries = comp_keys[pair_of_token] * n_tokens + token_ids[starts[base_keys[pair_of_token]] + offsets]
+            found = comp_codes[np.minimum(np.searchsorted(comp_codes, queries), len(comp_codes) - 1)] == queries
+            shared[first:first + len(pairs)] = np.bincount(pair_of_token - first, weights=found, minlength=len(pairs))
+        union = sizes[base_keys] + sizes[comp_keys + n_base] - shared
+        return shared / np.maximum(union, 1)
+
+    def _band_rows(self):
+        """Rows per LSH band: the most that still finds pairs at the threshold with the requested recall"""
+        for rows in range(self.num_perm, 0, -1):
+            bands = self.num_perm // rows
+            if 1 - (1 - self.threshold ** rows) ** bands >= self.recall:
+                return rows
+        return 1
+
+    def _lsh_pairs(self, token_ids, sizes, starts, n_base):
+        """Pairs of sets whose MinHash signatures agree on at least one LSH band"""
+        rng = np.random.default_rng(self.seed)
+        a = rng.integers(1, MINHASH_PRIME, self.num_perm, dtype=np.int64)
+        b = rng.integers(0, MINHASH_PRIME, self.num_perm, dtype=np.int64)
+
+        # Signatures of all sets, base sets first
+        signatures = np.empty((len(sizes), self.num_perm), dtype=np.int64)
+        for first in range(0, self.num_perm, 16):
+            block = slice(first, first + 16)
+            hashes = (token_ids[:, None] * a[block] + b[block]) % MINHASH_PRIME
+            signatures[:, block] = np.minimum.reduceat(hashes, starts, axis=0)
+
+        rows = self._band_rows()
+        codes = []
+        for band in range(self.num_perm // rows):
+            values = np.zeros(len(sizes), dtype=np.uint64)
+            for col in range(band * rows, (band + 1) * rows):
+                values = values * np.uint64(0x100000001B3) ^ signatures[:, col].astype(np.uint64)
+            base_buckets = pd.DataFrame({'bucket': values[:n_base], 'base': np.arange(n_base)})
+            comp_buckets = pd.DataFrame({'bucket': values[n_base:], 'comp': np.arange(len(sizes) - n_base)})
+            pairs = base_buckets.merge(comp_buckets, on='bucket')
+            codes.append(pairs['base'].to_numpy(dtype=np.int64) * (len(sizes) - n_base) + pairs['comp'].to_numpy())
+        codes = np.unique(np.concatenate(codes))
+        return codes // (len(sizes) - n_base), codes % (len(sizes) - n_base)
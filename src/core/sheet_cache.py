@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import tempfile
+import pandas as pd
+import numpy as np
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Bump when the standardized output of ExcelProcessor changes so old entries are ignored
+CACHE_VERSION = 5
+
+class SheetCache:
+    """Disk cache of standardized sheet DataFrames keyed by file content
+
+    Entries are stored as Parquet files when pyarrow is installed, otherwise
+    as compressed NumPy .npz archives. Metadata of an entry, such as the
+    header row and date formats found while parsing, is kept next to it in
+    a JSON file. The least recently used entries are evicted once the cache
+    grows past max_size_mb.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb=500):
+        if cache_dir is None:
+            app_data_path = os.environ.get('APPDATA', os.path.expanduser('~'))
+            cache_dir = os.path.join(app_data_path, 'ECT_Technis', 'sheet_cache')
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.extension = '.parquet' if PARQUET_AVAILABLE else '.npz'
+        self._file_hashes = {}  # Content hashes by (path, size, mtime)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_hash(self, file_path):
+        """Get the SHA-256 of a file's content, hashing each file version only once"""
+        stat = os.stat(file_path)
+        version = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if version not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._file_hashes[version] = digest.hexdigest()
+        return self._file_hashes[version]
+
+    def make_key(self, file_path, sheet_name, header_row, file_type, content_hash=None):
+        """Build the cache key of a parsed sheet
+
+        content_hash identifies the sheet content; the hash of the whole
+        file is used when it is not given.
+        """
+        content_hash = content_hash or self.file_hash(file_path)
+        parts = [CACHE_VERSION, content_hash, sheet_name, header_row, file_type]
+        return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key):
+        """Load a cached DataFrame, or None on a miss"""
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.extension == '.parquet':
+                df = pd.read_parquet(path)
+            else:
+                df = self._read_npz(path)
+            os.utime(path)  # Mark as recently used
+            return df
+        except Exception as e:
+            print(f"Error reading sheet cache entry {path}: {str(e)}")
+            return None
+
+    def get_meta(self, key):
+        """Load the metadata stored with an entry, or an empty dict if there is none"""
+        path = self._meta_path(key)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading sheet cache metadata {path}: {str(e)}")
+            return {}
+
+    def put(self, key, df, meta=None):
+        """Store a DataFrame, and its JSON-serializable metadata, and evict old entries if the cache is too large"""
+        path = self._entry_path(key)
+        tmp_path = None
+        try:
+            # Metadata goes first so an entry never appears without it
+            if meta is not None:
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.json')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, default=str)
+                os.replace(tmp_path, self._meta_path(key))
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.extension)
+            os.close(fd)
+            if self.extension == '.parquet':
+                df.to_parquet(tmp_path)
+            else:
+                self._write_npz(tmp_path, df)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing sheet cache entry {path}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_size_mb"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(('.parquet', '.npz')):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue  # Removed by another process meanwhile
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+            try:
+                os.remove(self._meta_path(os.path.splitext(name)[0]))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_npz(path, df):
+        """Write a DataFrame column by column into an .npz archive"""
+        arrays = {
+            '__columns__': np.array([str(col) for col in df.columns]),
+            '__index__': df.index.to_numpy(dtype=np.int64)
+        }
+        for i, col in enumerate(df.columns):
+            values = df.iloc[:, i]
+            if values.dtype == object:
+                # Standardized text columns: stored as fixed-width unicode
+                arrays[f'col_{i}'] = values.astype(str).to_numpy(dtype=str)
+            else:
+                arrays[f'col_{i}'] = values.to_numpy()
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @staticmethod
+    def _read_npz(path):
+        """Read a DataFrame written by _write_npz"""
+        with np.load(path, allow_pickle=False) as data:
+            columns = data['__columns__'].tolist()
+            frame = {}
+            for i, col in enumerate(columns):
+                values = data[f'col_{i}']
+                frame[col] = values.astype(object) if values.dtype.kind == 'U' else values
+            return pd.DataFrame(frame, index=pd.Index(data['__index__']), columns=columns)
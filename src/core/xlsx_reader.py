@@ -0,0 +1,223 @@
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, CALENDAR_MAC_1904
+
+# XML namespaces of the xlsx workbook parts
+XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+XLSX_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+ROW_TAG = f'{{{XLSX_MAIN_NS}}}row'
+CELL_TAG = f'{{{XLSX_MAIN_NS}}}c'
+VALUE_TAG = f'{{{XLSX_MAIN_NS}}}v'
+INLINE_STRING_TAG = f'{{{XLSX_MAIN_NS}}}is'
+TEXT_TAG = f'{{{XLSX_MAIN_NS}}}t'
+RUN_TAG = f'{{{XLSX_MAIN_NS}}}r'
+SHEET_DATA_TAG = f'{{{XLSX_MAIN_NS}}}sheetData'
+
+def xlsx_sheet_parts(archive):
+    """List (sheet name, worksheet part path) pairs of an xlsx archive in workbook order"""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {
+        rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{{{XLSX_PKG_REL_NS}}}Relationship')
+    }
+    parts = []
+    for sheet in workbook.iter(f'{{{XLSX_MAIN_NS}}}sheet'):
+        target = targets.get(sheet.get(f'{{{XLSX_REL_NS}}}id'), '')
+        part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        parts.append((sheet.get('name'), part))
+    return parts
+
+def text_content(element):
+    """Plain text of a shared or inline string item, rich text runs joined"""
+    parts = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            parts.append(child.text or '')
+        elif child.tag == RUN_TAG:
+            text = child.find(TEXT_TAG)
+            if text is not None:
+                parts.append(text.text or '')
+    return ''.join(parts)
+
+def cast_number(value):
+    """Convert a number stored as text to an int or float"""
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+class XlsxReader:
+    """Lean xlsx reader built on zipfile and incremental iterparse
+
+    Rows are decoded straight from the worksheet XML into tuples of plain
+    values, without building a cell object per value. Values match those
+    of openpyxl's read-only worksheets with values_only=True: shared and
+    inline strings are resolved, booleans and numbers are cast, and numbers
+    with a date format become datetimes.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.archive = zipfile.ZipFile(file_path)
+        try:
+            self.sheet_parts = dict(xlsx_sheet_parts(self.archive))
+            self.sheet_names = list(self.sheet_parts)
+            self.epoch = self._read_epoch()
+            self.date_styles = self._read_date_styles()
+        except Exception:
+            self.archive.close()
+            raise
+        self._shared_strings = None
+
+    def _read_epoch(self):
+        """Get the date system of the workbook"""
+        workbook = ET.fromstring(self.archive.read('xl/workbook.xml'))
+        properties = workbook.find(f'{{{XLSX_MAIN_NS}}}workbookPr')
+        date1904 = properties is not None and properties.get('date1904', 'false').lower() in ('1', 'true')
+        return CALENDAR_MAC_1904 if date1904 else WINDOWS_EPOCH
+
+    def _read_date_styles(self):
+        """Get the indexes of the cell styles whose number format is a date"""
+        if 'xl/styles.xml' not in self.archive.NameToInfo:
+            return set()
+        styles = ET.fromstring(self.archive.read('xl/styles.xml'))
+        custom = {}
+        num_fmts = styles.find(f'{{{XLSX_MAIN_NS}}}numFmts')
+        if num_fmts is not None:
+            for fmt in num_fmts:
+                custom[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+
+        date_styles = set()
+        cell_xfs = styles.find(f'{{{XLSX_MAIN_NS}}}cellXfs')
+        if cell_xfs is not None:
+            for index, xf in enumerate(cell_xfs):
+                fmt_id = int(xf.get('numFmtId', 0))
+                fmt = custom[fmt_id] if fmt_id in custom else BUILTIN_FORMATS.get(fmt_id)
+                if is_date_format(fmt):
+                    date_styles.add(index)
+        return date_styles
+
+    @property
+    def shared_strings(self):
+        """Shared strings table, read on first use"""
+        if self._shared_strings is None:
+            strings = []
+            if 'xl/sharedStrings.xml' in self.archive.NameToInfo:
+                si_tag = f'{{{XLSX_MAIN_NS}}}si'
+                with self.archive.open('xl/sharedStrings.xml') as f:
+                    for _, elem in ET.iterparse(f):
+                        if elem.tag == si_tag:
+                            strings.append(text_content(elem).replace('x005F_', ''))
+                            elem.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def iter_rows(self, sheet_name, min_row=None, max_row=None):
+        """Stream the cell values of each row of a sheet as tuples
+
+        Rows missing from the XML are yielded as empty lists, and each row
+        is as wide as its last cell, like openpyxl's read-only rows.
+        """
+        part = self.sheet_parts[sheet_name]
+        min_row = min_row or 1
+        counter = 1
+        row_counter = 0
+        sheet_data = None
+        with self.archive.open(part) as source:
+            for event, elem in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == SHEET_DATA_TAG:
+                        sheet_data = elem
+                    continue
+                if elem.tag != ROW_TAG:
+                    continue
+
+                row_number = elem.get('r')
+                row_counter = int(row_number) if row_number else row_counter + 1
+                if max_row is not None and row_counter > max_row:
+                    # Rows missing before max_row are still yielded as empty
+                    for number in range(counter, max_row + 1):
+                        if number >= min_row:
+                            yield []
+                    return
+                # Some rows are missing
+                while counter < row_counter:
+                    if counter >= min_row:
+                        yield []
+                    counter += 1
+                if counter == row_counter:
+                    if counter >= min_row:
+                        yield self._parse_row(elem)
+                    counter += 1
+                # Drop parsed rows so memory stays flat
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    elem.clear()
+
+    def _parse_row(self, row):
+        """Decode the cells of a row element into a tuple of values"""
+        cells = {}
+        column = 0
+        for cell in row:
+            if cell.tag != CELL_TAG:
+                continue
+            reference = cell.get('r')
+            if reference:
+                column = column_index(reference)
+            else:
+                column += 1
+            cells[column] = self._cell_value(cell)
+        if not cells:
+            return ()
+        values = [None] * column
+        for index, value in cells.items():
+            if index <= column:
+                values[index - 1] = value
+        return tuple(values)
+
+    def _cell_value(self, cell):
+        """Decode the value of a cell element"""
+        data_type = cell.get('t', 'n')
+        if data_type == 'inlineStr':
+            inline = cell.find(INLINE_STRING_TAG)
+            return text_content(inline) if inline is not None else None
+
+        value = cell.findtext(VALUE_TAG) or None
+        if value is None:
+            return None
+        if data_type == 'n':
+            value = cast_number(value)
+            style = cell.get('s')
+            if (int(style) if style else 0) in self.date_styles:
+                try:
+                    return from_excel(value, self.epoch)
+                except (OverflowError, ValueError):
+                    return '#VALUE!'
+            return value
+        if data_type == 's':
+            return self.shared_strings[int(value)]
+        if data_type == 'b':
+            return bool(int(value))
+        if data_type == 'd':
+            return from_ISO8601(value)
+        return value
+
+    def close(self):
+        """Close the zip archive"""
+        self.archive.close()
+
+_column_indexes = {}
+
+def column_index(reference):
+    """Get the 1-based column number of a cell reference like "AB12" """
+    letters = reference.rstrip('0123456789')
+    if letters not in _column_indexes:
+        number = 0
+        for letter in letters:
+            number = number * 26 + ord(letter) - ord('A') + 1
+        _column_indexes[letters] = number
+    return _column_indexes[letters]
@@ -181,7 +181,7 @@ class UploadManager {
             <div class="file-item">
                 <p><strong>Nom:</strong> ${info.filename}</p>
                 <p><strong>Feuilles trouvées:</strong> ${info.sheets.length}</p>
-                <p><strong>Feuilles:</strong> ${info.sheets.join(', ')}</p>
+                <p><strong>Feuilles:</strong> ${utils.formatSheetList(info.sheets, info.sheet_sizes)}</p>
             </div>
         `;
         
@@ -213,7 +213,7 @@ class UploadManager {
                 <div class="file-item">
                     <p><strong>Nom:</strong> ${file.filename}</p>
                     <p><strong>Feuilles trouvées:</strong> ${file.sheets.length}</p>
-                    <p><strong>Feuilles:</strong> ${file.sheets.join(', ')}</p>
+                    <p><strong>Feuilles:</strong> ${utils.formatSheetList(file.sheets, file.sheet_sizes)}</p>
                     <div class="preview-controls">
                         <label for="comp-sheet-select-${file.id}">Sélectionner une feuille :</label>
                         <select id="comp-sheet-select-${file.id}">
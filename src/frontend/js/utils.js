@@ -163,6 +163,16 @@ class Utils {
         return new Intl.NumberFormat('fr-FR').format(num);
     }
     
+    // Format sheet names with their row counts when known
+    static formatSheetList(sheets, sheetSizes) {
+        if (!sheetSizes) return sheets.join(', ');
+        return sheetSizes.map(sheet => {
+            if (sheet.rows === null || sheet.rows === undefined) return sheet.name;
+            const rows = `${sheet.estimated ? '~' : ''}${Utils.formatNumber(sheet.rows)} lignes`;
+            return `${sheet.name} (${rows})`;
+        }).join(', ');
+    }
+    
     // Calculate percentage
     static calculatePercentage(value, total) {
         if (total === 0) return 0;
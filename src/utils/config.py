@@ -21,6 +21,17 @@ class Config:
             "match_by_column_name": False,
             "match_by_column_position": True 
         },
+        "excel_processing": {
+            "streaming_reader": False,
+            "reader_engine": "openpyxl",
+            "compact_dtypes": False,
+            "layout_registry": True,
+            "layout_registry_path": None,
+            "sheet_cache": True,
+            "sheet_cache_dir": None,
+            "sheet_cache_max_size_mb": 500,
+            "max_workers": 0
+        },
         "ui_settings": {
             "theme": "light",
             "show_welcome_screen": True,
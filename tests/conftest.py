@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the application modules as src.core.*, like the backend does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,190 @@
+"""Parity of the native and openpyxl reader engines
+
+Edge-case workbooks are generated with xlsxwriter and openpyxl; both
+engines must return the same raw rows, grids and standardized frames.
+"""
+import datetime
+import random
+
+import openpyxl
+import pytest
+import xlsxwriter
+
+from src.core.excel_processor import ExcelProcessor, NativeWorkbookSession, open_session
+
+ROW_BOUNDS = [{}, dict(max_row=3), dict(min_row=2, max_row=2), dict(min_row=4, max_row=9)]
+LOADS = [{}, dict(is_base_file=True), dict(file_type='analysis')]
+
+COMPARISON_HEADERS = ["Site", "Série", "N° Matériel roulant", "Code opération", "Commentaire",
+                      "Date programmation", "Heure programmation", "Date sortie", "Heure sortie",
+                      "Semaine de programmation", "Date Butee"]
+PHP_HEADERS = ["STF", "SERIE", "N° Matériel Roulant", "Code Opération", "Libéllé Intervention",
+               "Date de Début", "Heure de\nDébut", "Date de Fin", "Heure de\nFin", "J", "K", "L",
+               "N° Semaine Ou Reliquat", "N", "Acceptée", "P"]
+
+
+def planning_workbook(path, header_row, rows=60):
+    """Comparison-style planning workbook with title rows, mixed date cells and gap rows"""
+    rng = random.Random(0)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for site in ("Lens", "BGL"):
+        ws = wb.create_sheet(site)
+        for r in range(header_row):
+            ws.append([f"Planning {site}" if r == 0 else None])
+        ws.append(COMPARISON_HEADERS)
+        for i in range(rows):
+            day = datetime.datetime(2025, 5, 1) + datetime.timedelta(days=rng.randint(0, 30))
+            ws.append(["LE", rng.choice(["BB27000", "BB75000"]), f"{rng.randint(27000, 27100)}",
+                       rng.choice(["VL", "VG", "RA"]), rng.choice(["révision", "graissage", None]),
+                       day.strftime("%d/%m/%Y") if i % 3 else day, f"{rng.randint(6, 20):02d}:00",
+                       day + datetime.timedelta(days=2), datetime.time(rng.randint(6, 20), 30),
+                       day.isocalendar()[1], None])
+            if i % 20 == 7:
+                ws.append([])
+    wb.save(path)
+
+
+def php_workbook(path, rows=60):
+    """PHP analysis workbook with times written as times, datetimes, fractions and text"""
+    rng = random.Random(1)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Lens"
+    ws.append(["PREPA PHP"])
+    ws.append([None])
+    ws.append(PHP_HEADERS)
+    for i in range(rows):
+        day = datetime.datetime(2025, 5, 1) + datetime.timedelta(days=rng.randint(0, 60))
+        time = rng.choice([datetime.time(8, 0), datetime.datetime(1900, 1, 1, 13, 30), 0.5, "07:45", None])
+        ws.append(["SFL", "BB27000", 27000 + rng.randint(0, 80), rng.choice(["VL", "VG"]),
+                   rng.choice(["révision", None]), day if i % 2 else day.strftime("%d/%m/%Y"), time,
+                   day + datetime.timedelta(days=rng.randint(0, 5)), time, "j", "k", "l",
+                   rng.choice([day.isocalendar()[1], "RELIQUAT"]), "n", rng.choice(["Oui", "Non"]), "p"])
+    wb.save(path)
+
+
+def edge_workbook(path, constant_memory=False):
+    """Rich text, errors, booleans, escapes, styled blanks, a sparse layout and an empty sheet
+
+    In constant_memory mode xlsxwriter writes inline strings instead of shared strings.
+    """
+    wb = xlsxwriter.Workbook(path, {'constant_memory': constant_memory})
+    ws = wb.add_worksheet('Edge')
+    date_format = wb.add_format({'num_format': 'dd/mm/yyyy'})
+    time_format = wb.add_format({'num_format': 'hh:mm'})
+    ws.write_row(0, 0, ['Site', 'Serie', 'Date', 'Heure', 'Flag', 'Err', 'Num'])
+    ws.write_string(1, 0, 'Lens')
+    ws.write_number(1, 1, 12)
+    ws.write_datetime(1, 2, datetime.datetime(2024, 3, 5), date_format)
+    ws.write_datetime(1, 3, datetime.datetime(1899, 12, 31, 8, 30), time_format)
+    ws.write_boolean(1, 4, True)
+    ws.write_formula(1, 5, '=1/0', None, '#DIV/0!')
+    ws.write_number(1, 6, 3.5)
+    ws.write_rich_string(4, 0, 'ab', wb.add_format({'bold': True}), 'cd')
+    ws.write_number(4, 9, 1e20)
+    ws.write_string(6, 2, 'x005F_y')
+    ws.write_string(7, 1, '_x005F_x0041_')
+    ws.write_blank(8, 3, None, date_format)
+    wb.add_worksheet('Empty')
+    wb.close()
+
+
+def mac_workbook(path):
+    """Workbook using the 1904 date system"""
+    wb = openpyxl.Workbook()
+    wb.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904
+    ws = wb.active
+    ws.title = 'Mac'
+    ws.append(['a', 'b'])
+    ws['A3'] = datetime.datetime(2023, 1, 2)
+    ws['C5'] = 'z'
+    ws['B2'] = -7
+    wb.save(path)
+
+
+WORKBOOKS = {
+    'base': lambda path: planning_workbook(path, header_row=2),
+    'comparison': lambda path: planning_workbook(path, header_row=7),
+    'php': php_workbook,
+    'edge': edge_workbook,
+    'inline': lambda path: edge_workbook(path, constant_memory=True),
+    'mac1904': mac_workbook,
+}
+
+
+@pytest.fixture(params=sorted(WORKBOOKS))
+def workbook(request, tmp_path):
+    path = str(tmp_path / f"{request.param}.xlsx")
+    WORKBOOKS[request.param](path)
+    return path
+
+
+def test_raw_rows_and_grids_match(workbook):
+    pandas_session, native_session = open_session(workbook, 'openpyxl'), open_session(workbook, 'native')
+    try:
+        assert isinstance(native_session, NativeWorkbookSession)
+        assert native_session.sheet_names == pandas_session.sheet_names
+        for sheet in pandas_session.sheet_names:
+            for bounds in ROW_BOUNDS:
+                assert list(native_session.iter_rows(sheet, **bounds)) == \
+                    list(pandas_session.iter_rows(sheet, **bounds)), (sheet, bounds)
+            assert native_session.get_grid(sheet) == pandas_session.get_grid(sheet), sheet
+    finally:
+        pandas_session.close()
+        native_session.close()
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_standardized_frames_match(workbook, streaming):
+    processors = [ExcelProcessor(workbook, streaming=streaming, engine=engine, cache=False, layouts=False)
+                  for engine in ('openpyxl', 'native')]
+    try:
+        for processor in processors:
+            assert processor.load_workbook()
+        pandas_processor, native_processor = processors
+        for sheet in pandas_processor.sheet_names:
+            for load in LOADS:
+                expected = pandas_processor.get_sheet_data(sheet, **load)
+                result = native_processor.get_sheet_data(sheet, **load)
+                assert list(result.columns) == list(expected.columns), (sheet, load)
+                assert list(result.dtypes) == list(expected.dtypes), (sheet, load)
+                assert result.equals(expected), (sheet, load)
+    finally:
+        for processor in processors:
+            processor.close()
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'native'])
+def test_streamed_sheets_match_read_sheet(workbook, engine):
+    session = open_session(workbook, engine)
+    try:
+        for sheet in session.sheet_names:
+            for skiprows in (0, 2, 7):
+                for usecols in (None, ExcelProcessor.COMPARISON_COLUMNS):
+                    expected = session.read_sheet(sheet, skiprows=skiprows, usecols=usecols)
+                    result = session.stream_sheet(sheet, skiprows=skiprows, usecols=usecols)
+                    assert list(result.columns) == list(expected.columns), (sheet, skiprows, usecols)
+                    assert list(result.dtypes) == list(expected.dtypes), (sheet, skiprows, usecols)
+                    assert result.equals(expected), (sheet, skiprows, usecols)
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'native'])
+def test_streamed_frames_match_read_frames(workbook, engine):
+    processors = [ExcelProcessor(workbook, streaming=streaming, engine=engine, cache=False, layouts=False)
+                  for streaming in (False, True)]
+    try:
+        read_processor, streaming_processor = processors
+        read_processor.load_workbook()
+        for sheet in read_processor.sheet_names:
+            for load in LOADS:
+                expected = read_processor.get_sheet_data(sheet, **load)
+                result = streaming_processor.get_sheet_data(sheet, **load)
+                assert list(result.columns) == list(expected.columns), (sheet, load)
+                assert list(result.dtypes) == list(expected.dtypes), (sheet, load)
+                assert result.equals(expected), (sheet, load)
+    finally:
+        for processor in processors:
+            processor.close()
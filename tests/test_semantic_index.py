@@ -0,0 +1,103 @@
+"""The semantic index against the plain Jaccard double loop, on small inputs"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.comparison_engine import ComparisonEngine
+from src.core.semantic_index import SemanticIndex
+
+VOCABULARY = [f"w{i}" for i in range(12)]
+# Jaccard similarity of exactly 3/10, on the 0.3 threshold
+BOUNDARY_BASE = {'w0', 'w1', 'w2', 'w3', 'w4', 'w5'}
+BOUNDARY_COMP = {'w3', 'w4', 'w5', 'x1', 'x2', 'x3', 'x4'}
+
+
+def word_sets(n, seed):
+    """Random word sets over a small vocabulary, some empty and some repeated"""
+    rng = random.Random(seed)
+    return [set(rng.sample(VOCABULARY, rng.randint(0, 5))) for _ in range(n)]
+
+
+def jaccard(left, right):
+    return len(left & right) / len(left | right)
+
+
+def brute_force_pairs(base_sets, comp_sets, threshold):
+    """Pairs of non-empty sets whose Jaccard similarity reaches the threshold, with the index's slack"""
+    return {(i, j) for i, left in enumerate(base_sets) for j, right in enumerate(comp_sets)
+            if left and right and jaccard(left, right) >= threshold - 1e-9}
+
+
+@pytest.mark.parametrize('threshold', [0.2, 0.3, 1 / 3, 0.5, 1.0])
+def test_similar_pairs_match_brute_force(threshold):
+    base_sets = word_sets(80, seed=1) + [BOUNDARY_BASE, set()]
+    comp_sets = word_sets(70, seed=2) + [BOUNDARY_COMP, set()]
+    base_rows, comp_rows = SemanticIndex(threshold, recall=1.0).similar_pairs(base_sets, comp_sets)
+
+    pairs = list(zip(base_rows.tolist(), comp_rows.tolist()))
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == brute_force_pairs(base_sets, comp_sets, threshold)
+
+
+def test_similar_pairs_on_given_rows_match_brute_force():
+    base_sets = word_sets(40, seed=3) + [BOUNDARY_BASE]
+    comp_sets = word_sets(30, seed=4) + [BOUNDARY_COMP]
+    rng = np.random.default_rng(0)
+    given_base = rng.integers(0, len(base_sets), 300)
+    given_comp = rng.integers(0, len(comp_sets), 300)
+    given_base[0], given_comp[0] = len(base_sets) - 1, len(comp_sets) - 1
+
+    base_rows, comp_rows = SemanticIndex(0.3, recall=1.0).similar_pairs(base_sets, comp_sets, given_base, given_comp)
+
+    expected = [(i, j) for i, j in zip(given_base.tolist(), given_comp.tolist())
+                if base_sets[i] and comp_sets[j] and jaccard(base_sets[i], comp_sets[j]) >= 0.3 - 1e-9]
+    assert list(zip(base_rows.tolist(), comp_rows.tolist())) == expected
+
+
+def text_frame(sets_by_column, prefix):
+    """Prepared-like frame with a key and one text column per list of word sets"""
+    frame = {col: [' '.join(sorted(words)) for words in sets] for col, sets in sets_by_column.items()}
+    n = len(next(iter(sets_by_column.values())))
+    frame['key'] = [f"{prefix}{i}" for i in range(n)]
+    return pd.DataFrame(frame)
+
+
+def brute_force_matches(base_sets, comp_sets, threshold=30):
+    """Semantic matches as a plain double loop: average word overlap over the columns with words"""
+    matches = []
+    n_base = len(next(iter(base_sets.values())))
+    n_comp = len(next(iter(comp_sets.values())))
+    for i in range(n_base):
+        for j in range(n_comp):
+            scores = {col: jaccard(base_sets[col][i], comp_sets[col][j]) * 100
+                      for col in base_sets if base_sets[col][i] or comp_sets[col][j]}
+            if scores and sum(scores.values()) / len(scores) > threshold:
+                matches.append((f"b{i}", f"c{j}", sum(scores.values()) / len(scores), scores))
+    return matches
+
+
+def test_semantic_comparison_matches_brute_force(monkeypatch):
+    base_sets = {'Commentaire': word_sets(50, seed=5) + [BOUNDARY_BASE],
+                 'Description': word_sets(51, seed=6)}
+    comp_sets = {'Commentaire': word_sets(40, seed=7) + [BOUNDARY_COMP],
+                 'Description': word_sets(41, seed=8)}
+    # A boundary pair whose only column with words is Commentaire
+    base_sets['Description'][-1], comp_sets['Description'][-1] = set(), set()
+    base, comp = text_frame(base_sets, 'b'), text_frame(comp_sets, 'c')
+
+    engine = ComparisonEngine(value_columns=['Commentaire', 'Description'])
+    engine.semantic_index['recall'] = 1.0
+    # prepare() would turn free text into numbers: feed the frames as already prepared
+    monkeypatch.setattr(engine, 'prepared', lambda df: df)
+    results = engine._semantic_comparison(base, comp)['differences']
+
+    expected = brute_force_matches(base_sets, comp_sets)
+    assert list(zip(results['base_key'], results['comp_key'])) == [(b, c) for b, c, _, _ in expected]
+    # The index keeps the boundary pair (>= 0.3 - 1e-9), its average of exactly 30 is then rejected
+    assert jaccard(BOUNDARY_BASE, BOUNDARY_COMP) * 100 == 30
+    assert ('b50', 'c40') not in set(zip(results['base_key'], results['comp_key']))
+    assert results['semantic_score'].tolist() == pytest.approx([score for _, _, score, _ in expected])
+    for column_scores, (_, _, _, expected_scores) in zip(results['column_scores'], expected):
+        assert column_scores == pytest.approx(expected_scores)
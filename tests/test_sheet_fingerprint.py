@@ -0,0 +1,69 @@
+"""Sheet cache keys must follow the content of each tab, not of the whole workbook"""
+import shutil
+import zipfile
+
+import pytest
+import xlsxwriter
+
+from src.core.excel_processor import sheet_fingerprint
+from src.core.sheet_cache import SheetCache
+
+TABS = ['Lens', 'BGL', 'Arles']
+
+
+def planning_workbook(path, edited_tab=None, rows=200):
+    """Three tabs of shared strings; editing a tab adds a string that renumbers those of the next tabs"""
+    wb = xlsxwriter.Workbook(path)
+    for tab in TABS:
+        ws = wb.add_worksheet(tab)
+        ws.write_row(0, 0, ['Site', 'Serie', 'Locomotive', 'CodeOp', 'Commentaire'])
+        for i in range(rows):
+            comment = f"révision {tab} {i % 37}"
+            if tab == edited_tab and i == 5:
+                comment = "commentaire modifié"
+            ws.write_row(i + 1, 0, [tab.upper(), 'BB27000', 27000 + i % 50, 'VL', comment])
+            ws.write_number(i + 1, 5, i * 1.5)
+    wb.close()
+
+
+def cache_keys(cache, path):
+    return {tab: cache.make_key(path, tab, 'auto', None, sheet_fingerprint(path, tab)) for tab in TABS}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SheetCache(str(tmp_path / 'cache'))
+
+
+def test_editing_one_tab_keeps_the_keys_of_the_others(tmp_path, cache):
+    original, edited = str(tmp_path / 'original.xlsx'), str(tmp_path / 'edited.xlsx')
+    planning_workbook(original)
+    planning_workbook(edited, edited_tab='BGL')
+
+    # The edit renumbers the shared strings referenced by the last tab
+    with zipfile.ZipFile(original) as before, zipfile.ZipFile(edited) as after:
+        assert before.read('xl/worksheets/sheet3.xml') != after.read('xl/worksheets/sheet3.xml')
+        assert before.read('xl/sharedStrings.xml') != after.read('xl/sharedStrings.xml')
+
+    keys, edited_keys = cache_keys(cache, original), cache_keys(cache, edited)
+    assert edited_keys['Lens'] == keys['Lens']
+    assert edited_keys['Arles'] == keys['Arles']
+    assert edited_keys['BGL'] != keys['BGL']
+    assert len(set(keys.values())) == len(TABS)
+
+
+def test_keys_follow_content_not_path(tmp_path, cache):
+    original, upload = str(tmp_path / 'original.xlsx'), str(tmp_path / 'upload_1234.xlsx')
+    planning_workbook(original)
+    shutil.copy(original, upload)
+    assert cache_keys(cache, upload) == cache_keys(cache, original)
+
+
+def test_numbers_and_strings_are_told_apart(tmp_path):
+    strings, numbers = str(tmp_path / 'strings.xlsx'), str(tmp_path / 'numbers.xlsx')
+    for path, write in ((strings, 'write_string'), (numbers, 'write_number')):
+        wb = xlsxwriter.Workbook(path)
+        ws = wb.add_worksheet('Lens')
+        getattr(ws, write)(0, 0, '0' if write == 'write_string' else 0)
+        wb.close()
+    assert sheet_fingerprint(strings, 'Lens') != sheet_fingerprint(numbers, 'Lens')